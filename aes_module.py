@@ -4,16 +4,131 @@ AES-256-GCM Encryption Module
 This module handles:
 - Random session key generation (256-bit)
 - Random IV generation (96-bit for GCM)
-- AES-256-GCM encryption
+- Reusable encryption contexts for many messages under one key
+- AES-256-GCM encryption (one-shot or incremental)
 - AES-256-GCM decryption with authentication tag verification
+- Optional associated data, authenticated but not encrypted
+- Incremental (chunked) AES-256-GCM decryption for streaming pipelines
 
-Uses PyCryptodome (pure Python) - no DLL issues!
+Uses the `cryptography` AESGCM primitive, which is backed by OpenSSL's EVP
+interface. OpenSSL selects its stitched AES-NI/VAES + PCLMULQDQ kernels (or
+ARMv8 AES + PMULL) at runtime, so GHASH runs on carry-less multiply hardware
+instead of a generic C loop. If `cryptography` is not installed, falls back
+to PyCryptodome's AES-GCM.
 """
 
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
+import functools
 import os
 
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.backends.openssl import backend as _openssl_backend
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    HAS_CRYPTOGRAPHY = True
+    AES_BACKEND = f"cryptography ({_openssl_backend.openssl_version_text()})"
+except ImportError:
+    from Crypto.Cipher import AES
+    HAS_CRYPTOGRAPHY = False
+    AES_BACKEND = "PyCryptodome"
+    print("Warning: cryptography not available. Using PyCryptodome AES-GCM.")
+
+
+
+def _cpu_flags():
+    """
+    Return the CPU feature flags reported by /proc/cpuinfo.
+    
+    Returns:
+        Set of flag names (empty where /proc/cpuinfo is unavailable)
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                # "flags" on x86, "Features" on ARM
+                if line.startswith(("flags", "Features")):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def _detect_aead_engine():
+    """
+    Describe the AES-GCM kernel OpenSSL will dispatch to on this machine.
+    
+    OpenSSL 3.0+ ships the VAES + VPCLMULQDQ (AVX-512) GCM kernel; older
+    builds or CPUs without those extensions use the AES-NI + PCLMULQDQ
+    kernel. The choice is made inside OpenSSL at runtime, so this is
+    informational only.
+    
+    Returns:
+        Human-readable engine name
+    """
+    if not HAS_CRYPTOGRAPHY:
+        return AES_BACKEND
+    
+    flags = _cpu_flags()
+    if (_openssl_backend.openssl_version_number() >= 0x30000000
+            and {"vaes", "vpclmulqdq", "avx512f"} <= flags):
+        kernel = "VAES-AVX512 + VPCLMULQDQ"
+    elif {"aes", "pclmulqdq"} <= flags:
+        kernel = "AES-NI + PCLMULQDQ"
+    elif {"aes", "pmull"} <= flags:
+        kernel = "ARMv8 AES + PMULL"
+    else:
+        kernel = "generic"
+    return f"{AES_BACKEND}, {kernel}"
+
+
+# AES-GCM kernel in use, for logging by the encrypt/decrypt front ends
+_AEAD_ENGINE = _detect_aead_engine()
+
+# Key and IV sizes for AES-256-GCM
+KEY_SIZE = 32
+IV_SIZE = 12
+
+# Number of expanded keys kept by _get_cached_aesgcm
+GCM_KEY_CACHE_SIZE = 32
+
+
+@functools.lru_cache(maxsize=GCM_KEY_CACHE_SIZE)
+def _get_cached_aesgcm(key: bytes) -> "AESGCM":
+    """
+    Return an AESGCM object for key, reusing it across decrypt calls.
+    
+    Building an AESGCM runs the AES key expansion and GHASH setup, so
+    repeated decryptions under the same key (the chunks of one chunked
+    message, re-decrypting a QR code) skip that work. Encryption doesn't
+    use the cache: session keys are fresh there, so every lookup would
+    miss and only keep the key alive (see new_aes_gcm_context instead).
+    Keyed on the key bytes rather than id(key), so equal keys from
+    different objects share an entry and a recycled id can never map to
+    the wrong key. Trade-off: up to GCM_KEY_CACHE_SIZE recently decrypted
+    session keys stay in memory until evicted; call
+    _get_cached_aesgcm.cache_clear() to drop them.
+    """
+    return AESGCM(key)
+
+
+def new_aes_gcm_context(key: bytes):
+    """
+    Build a reusable AES-GCM context for encrypting many messages under key.
+    
+    Pass it as encrypt_with_aes_gcm's context to skip the key setup on each
+    call (e.g. for the chunks of one encrypt_data_chunked message, which
+    share a session key). The context holds the key; drop it when done.
+    
+    Args:
+        key: AES key (32 bytes)
+    
+    Returns:
+        AESGCM object, or None with PyCryptodome (which has no reusable context)
+    """
+    if len(key) != 32:
+        raise ValueError(f"AES-256 requires 32-byte key, got {len(key)} bytes")
+    return AESGCM(bytes(key)) if HAS_CRYPTOGRAPHY else None
+
 
 def generate_session_key():
     """
@@ -22,7 +137,7 @@ def generate_session_key():
     Returns:
         32-byte random key as bytes
     """
-    return get_random_bytes(32)
+    return os.urandom(KEY_SIZE)
 
 
 def generate_iv():
@@ -32,10 +147,24 @@ def generate_iv():
     Returns:
         12-byte random IV as bytes
     """
-    return get_random_bytes(12)
+    return os.urandom(IV_SIZE)
+
+
+def _draw_key_and_iv():
+    """
+    Generate a fresh session key and IV from a single random draw.
+    
+    One 44-byte os.urandom call (a single getrandom() syscall where
+    available) instead of one call each for the key and the IV.
+    
+    Returns:
+        tuple: (32-byte key, 12-byte IV)
+    """
+    buf = os.urandom(KEY_SIZE + IV_SIZE)
+    return buf[:KEY_SIZE], buf[KEY_SIZE:]
 
 
-def encrypt_with_aes_gcm(plaintext, key=None, iv=None):
+def encrypt_with_aes_gcm(plaintext, key=None, iv=None, associated_data=None, context=None):
     """
     Encrypt data using AES-256-GCM.
     
@@ -43,14 +172,20 @@ def encrypt_with_aes_gcm(plaintext, key=None, iv=None):
         plaintext: Data to encrypt (bytes)
         key: AES key (32 bytes). If None, generates a new one.
         iv: Initialization vector (12 bytes). If None, generates a new one.
+        associated_data: Bytes authenticated by the tag but not encrypted
+            (optional; decryption must pass the same bytes)
+        context: Context from new_aes_gcm_context(key), to reuse across
+            calls with the same key (optional)
     
     Returns:
         tuple: (ciphertext, tag, key, iv)
     """
     # Generate key and IV if not provided
-    if key is None:
+    if key is None and iv is None:
+        key, iv = _draw_key_and_iv()
+    elif key is None:
         key = generate_session_key()
-    if iv is None:
+    elif iv is None:
         iv = generate_iv()
     
     # Validate key size
@@ -61,16 +196,63 @@ def encrypt_with_aes_gcm(plaintext, key=None, iv=None):
     if len(iv) != 12:
         raise ValueError(f"AES-GCM requires 12-byte IV, got {len(iv)} bytes")
     
-    # Create AES-GCM cipher
-    cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
-    
-    # Encrypt and generate tag
-    ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+    if HAS_CRYPTOGRAPHY:
+        # Encrypt; AESGCM returns ciphertext with the 16-byte tag appended
+        aesgcm = context if context is not None else AESGCM(bytes(key))
+        sealed = aesgcm.encrypt(iv, plaintext, associated_data)
+        ciphertext, tag = sealed[:-16], sealed[-16:]
+    else:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
+        if associated_data:
+            cipher.update(associated_data)
+        ciphertext, tag = cipher.encrypt_and_digest(plaintext)
     
     return ciphertext, tag, key, iv
 
 
-def decrypt_with_aes_gcm(ciphertext, tag, key, iv):
+def encrypt_with_aes_gcm_stream(plaintext_chunks, out, key, iv, associated_data=None):
+    """
+    Encrypt AES-256-GCM plaintext incrementally into a buffer.
+    
+    Each plaintext chunk is encrypted as soon as it arrives and its
+    ciphertext appended to out, so neither the full plaintext nor a
+    separate ciphertext buffer has to exist.
+    
+    Args:
+        plaintext_chunks: Iterable of plaintext chunks (bytes-like)
+        out: bytearray the ciphertext is appended to
+        key: AES key (32 bytes)
+        iv: Initialization vector (12 bytes)
+        associated_data: Bytes authenticated by the tag but not encrypted
+            (optional)
+    
+    Returns:
+        Authentication tag (16 bytes)
+    """
+    # Validate inputs
+    if len(key) != 32:
+        raise ValueError(f"AES-256 requires 32-byte key, got {len(key)} bytes")
+    if len(iv) != 12:
+        raise ValueError(f"AES-GCM requires 12-byte IV, got {len(iv)} bytes")
+    
+    if not HAS_CRYPTOGRAPHY:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
+        if associated_data:
+            cipher.update(associated_data)
+        for chunk in plaintext_chunks:
+            out += cipher.encrypt(chunk)
+        return cipher.digest()
+    
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(iv)).encryptor()
+    if associated_data:
+        encryptor.authenticate_additional_data(associated_data)
+    for chunk in plaintext_chunks:
+        out += encryptor.update(chunk)
+    encryptor.finalize()
+    return encryptor.tag
+
+
+def decrypt_with_aes_gcm(ciphertext, tag, key, iv, associated_data=None):
     """
     Decrypt data using AES-256-GCM with authentication tag verification.
     
@@ -79,6 +261,7 @@ def decrypt_with_aes_gcm(ciphertext, tag, key, iv):
         tag: Authentication tag (16 bytes)
         key: AES key (32 bytes)
         iv: Initialization vector (12 bytes)
+        associated_data: Associated data given at encryption (optional)
     
     Returns:
         Decrypted plaintext (bytes)
@@ -95,20 +278,80 @@ def decrypt_with_aes_gcm(ciphertext, tag, key, iv):
         raise ValueError(f"AES-GCM tag must be 16 bytes, got {len(tag)} bytes")
     
     try:
-        # Create AES-GCM cipher
-        cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
-        
-        # Decrypt and verify tag
-        # If tag is invalid, this will raise an exception
-        plaintext = cipher.decrypt_and_verify(ciphertext, tag)
+        if HAS_CRYPTOGRAPHY:
+            # Decrypt and verify tag (AESGCM expects the tag appended to the ciphertext)
+            # If tag is invalid, this will raise InvalidTag
+            plaintext = _get_cached_aesgcm(bytes(key)).decrypt(iv, ciphertext + tag, associated_data)
+        else:
+            cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
+            if associated_data:
+                cipher.update(associated_data)
+            plaintext = cipher.decrypt_and_verify(ciphertext, tag)
         return plaintext
     except Exception as e:
+        if HAS_CRYPTOGRAPHY and isinstance(e, InvalidTag):
+            raise ValueError("AES-GCM decryption failed (authentication tag mismatch or wrong key)")
         raise ValueError(f"AES-GCM decryption failed (authentication tag mismatch or wrong key): {str(e)}")
 
 
+def decrypt_with_aes_gcm_stream(ciphertext_chunks, tag, key, iv, associated_data=None):
+    """
+    Decrypt AES-256-GCM ciphertext incrementally.
+    
+    Plaintext chunks are yielded as ciphertext chunks are consumed, so the
+    full plaintext never has to exist as one buffer. The tag is verified
+    after the last chunk: everything yielded before that is unauthenticated
+    and must be discarded by the caller if ValueError is raised.
+    
+    Args:
+        ciphertext_chunks: Iterable of ciphertext chunks (bytes-like)
+        tag: Authentication tag (16 bytes)
+        key: AES key (32 bytes)
+        iv: Initialization vector (12 bytes)
+        associated_data: Associated data given at encryption (optional)
+    
+    Yields:
+        Decrypted plaintext chunks (bytes)
+    
+    Raises:
+        ValueError: If authentication fails (tag mismatch, wrong key, etc.)
+    """
+    # Validate inputs
+    if len(key) != 32:
+        raise ValueError(f"AES-256 requires 32-byte key, got {len(key)} bytes")
+    if len(iv) != 12:
+        raise ValueError(f"AES-GCM requires 12-byte IV, got {len(iv)} bytes")
+    if len(tag) != 16:
+        raise ValueError(f"AES-GCM tag must be 16 bytes, got {len(tag)} bytes")
+    
+    if not HAS_CRYPTOGRAPHY:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=iv)
+        if associated_data:
+            cipher.update(associated_data)
+        for chunk in ciphertext_chunks:
+            yield cipher.decrypt(chunk)
+        try:
+            cipher.verify(tag)
+        except ValueError:
+            raise ValueError("AES-GCM decryption failed (authentication tag mismatch or wrong key)")
+        return
+    
+    decryptor = Cipher(algorithms.AES(key), modes.GCM(iv, tag)).decryptor()
+    if associated_data:
+        decryptor.authenticate_additional_data(associated_data)
+    for chunk in ciphertext_chunks:
+        yield decryptor.update(chunk)
+    
+    try:
+        # Verify tag; GCM has no buffered output, so finalize only authenticates
+        decryptor.finalize()
+    except InvalidTag:
+        raise ValueError("AES-GCM decryption failed (authentication tag mismatch or wrong key)")
+
+
 # Example usage and testing
 if __name__ == "__main__":
-    print("Testing AES-256-GCM encryption/decryption (using PyCryptodome)...")
+    print(f"Testing AES-256-GCM encryption/decryption (using {_AEAD_ENGINE})...")
     
     # Test data
     test_data = b"This is a test message that will be encrypted with AES-256-GCM."
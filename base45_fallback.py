@@ -0,0 +1,105 @@
+"""
+Base45 Fallback Module
+
+Pure-Python RFC 9285 Base45 decoder, used by base45_module only when the
+base45 library cannot be imported. Kept out of the main module so the
+normal decode path carries no fallback code. (Encoding never needs the
+library: base45_module has its own NumPy and struct encoders.)
+
+Exposes b45decode with the same signature as the base45 library, so
+base45_module can bind either implementation at import time.
+"""
+
+import struct
+
+
+# Base45 character set (45 characters)
+BASE45_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+
+# Decode lookup table for bytes.translate: byte -> Base45 value, 0xFF if invalid
+_B45_INVALID = 0xFF
+_B45_DECODE_TABLE = bytes(
+    BASE45_CHARS.index(chr(b)) if chr(b) in BASE45_CHARS else _B45_INVALID
+    for b in range(256)
+)
+
+# Decode place-value tables: byte -> digit * 1, * 45, * 2025. Characters
+# outside the alphabet map to a value larger than any valid 16-bit group.
+_B45_OVERFLOW = 1 << 17
+_B45_T0, _B45_T1, _B45_T2 = (
+    tuple(_B45_OVERFLOW if v == _B45_INVALID else v * place for v in _B45_DECODE_TABLE)
+    for place in (1, 45, 45 * 45)
+)
+
+
+def b45decode(encoded: str) -> bytes:
+    """
+    Decode a Base45 string to binary data (library-compatible signature).
+    
+    Args:
+        encoded: Base45-encoded string
+    
+    Returns:
+        Decoded binary data (bytes)
+    
+    Raises:
+        ValueError: If the string contains invalid characters or values
+    """
+    return _decode_base45_manual(encoded)
+
+
+def _decode_base45_manual(encoded: str) -> bytes:
+    """
+    Manual Base45 decoding implementation.
+    
+    Implements RFC 9285 Base45 decoding.
+    
+    Each character of a triplet is looked up in a table holding its digit
+    already multiplied by its place value (1, 45, 2025), so a triplet costs
+    three lookups and two adds. Invalid characters map to a value that
+    always overflows, so one max() check covers both invalid characters
+    and out-of-range triplets; the exact error is only worked out when
+    that check fails. Words are packed to big-endian bytes in bulk.
+    """
+    if len(encoded) == 0:
+        return b""
+    
+    # A lone trailing character can't encode a byte (RFC 9285 section 4.2)
+    if len(encoded) % 3 == 1:
+        raise ValueError("Invalid Base45 encoding: incomplete group")
+    
+    # Non-ASCII characters become '?', which is also invalid
+    buf = encoded.encode('ascii', 'replace')
+    
+    # Three characters -> two bytes, for every complete triplet
+    full = len(buf) - len(buf) % 3
+    words = [_B45_T0[c0] + _B45_T1[c1] + _B45_T2[c2] for c0, c1, c2 in
+             zip(buf[0:full:3], buf[1:full:3], buf[2:full:3])]
+    
+    # Two characters -> one byte
+    tail = buf[full:]
+    tail_value = _B45_T0[tail[0]] + _B45_T1[tail[1]] if tail else 0
+    
+    if (words and max(words) > 65535) or tail_value > 255:
+        _raise_decode_error(encoded)
+    
+    # Output size is known up front; pack straight into a preallocated buffer
+    out = bytearray(len(words) * 2 + (1 if tail else 0))
+    struct.pack_into(f">{len(words)}H", out, 0, *words)
+    if tail:
+        out[-1] = tail_value
+    
+    return bytes(out)
+
+
+def _raise_decode_error(encoded: str):
+    """
+    Raise the ValueError describing why encoded is not valid Base45.
+    
+    Reports the first character outside the alphabet if there is one,
+    otherwise a group whose value is out of range.
+    """
+    values = encoded.encode('ascii', 'replace').translate(_B45_DECODE_TABLE)
+    if _B45_INVALID in values:
+        raise ValueError(f"Invalid Base45 character: {encoded[values.index(_B45_INVALID)]}")
+    raise ValueError("Invalid Base45 encoding: value too large")
@@ -12,18 +12,185 @@ Why Base45?
 - More compact than Base64 for QR codes
 - Uses characters that QR scanners handle well
 - Used in real-world applications (EU Digital COVID Certificate)
+
+When NumPy is installed, encoding and decoding are vectorized over whole
+buffers (same output and accepted input as the base45 library, RFC 9285).
+Without NumPy, encoding uses a bulk struct/bytearray implementation and
+decoding uses the base45 library (or the pure-Python fallback). With
+Numba installed, enable_numba() switches encoding to a JIT-compiled loop.
 """
 
+import struct
+
 try:
-    import base45
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from base45 import b45decode as _b45decode
     HAS_BASE45_LIB = True
 except ImportError:
+    # Pure-Python implementation, only loaded when the library is missing
+    from base45_fallback import b45decode as _b45decode
     HAS_BASE45_LIB = False
 
 
 # Base45 character set (45 characters)
 BASE45_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
 
+# Encode lookup table for bytes.translate: digit value 0..44 -> ASCII character
+_B45_ENCODE_TABLE = BASE45_CHARS.encode('ascii').ljust(256, b'\0')
+
+if HAS_NUMPY:
+    # Digit value -> ASCII character, and ASCII byte -> digit value (0xFF if invalid)
+    _B45_INVALID = 0xFF
+    _B45_ALPHABET_NP = np.frombuffer(BASE45_CHARS.encode('ascii'), np.uint8)
+    _B45_DECODE_LUT_NP = np.full(256, _B45_INVALID, np.uint8)
+    _B45_DECODE_LUT_NP[_B45_ALPHABET_NP] = np.arange(45, dtype=np.uint8)
+
+# JIT-compiled encoder, set by enable_numba()
+_encode_core = None
+
+
+def enable_numba() -> bool:
+    """
+    Switch encode_base45 to a Numba-compiled loop, if Numba is installed.
+    
+    Off by default: importing Numba and loading the cached kernel takes
+    roughly half a second, which only pays off in a long-running process
+    such as the GUI, not in a one-shot command-line run. Compiled code is
+    cached on disk, so only the first run after installation also pays
+    the compile time.
+    
+    Returns:
+        True if the Numba encoder is active
+    """
+    global _encode_core
+    if _encode_core is not None:
+        return True
+    if not HAS_NUMPY:
+        return False
+    try:
+        from numba import njit
+    except ImportError:
+        return False
+    
+    @njit(cache=True, boundscheck=False, fastmath=False)
+    def encode_core(buf, out):
+        # Writes the Base45 ASCII encoding of uint8 buf into out (at least
+        # (len(buf) + 1) // 2 * 3 bytes) and returns the number written
+        n = buf.shape[0]
+        j = 0
+        for i in range(0, n - 1, 2):
+            value = np.int64(buf[i]) * 256 + buf[i + 1]
+            out[j] = _B45_ALPHABET_NP[value % 45]
+            out[j + 1] = _B45_ALPHABET_NP[value // 45 % 45]
+            out[j + 2] = _B45_ALPHABET_NP[value // 2025]
+            j += 3
+        if n % 2:
+            # Trailing byte -> two digits
+            value = np.int64(buf[n - 1])
+            out[j] = _B45_ALPHABET_NP[value % 45]
+            out[j + 1] = _B45_ALPHABET_NP[value // 45]
+            j += 2
+        return j
+    
+    # Compile (or load from cache) now rather than on the first encryption.
+    # Same argument types as _encode_base45_numba: the read-only array
+    # np.frombuffer gives for bytes is a different Numba type from a
+    # writable one, and would compile a second specialization.
+    encode_core(np.frombuffer(b"\0", np.uint8), np.empty(3, np.uint8))
+    _encode_core = encode_core
+    return True
+
+
+def _encode_base45_numba(data: bytes) -> str:
+    """Numba RFC 9285 Base45 encoding: same output as _encode_base45_numpy."""
+    out = np.empty((len(data) + 1) // 2 * 3, np.uint8)
+    n = _encode_core(np.frombuffer(data, np.uint8), out)
+    return bytes(out[:n]).decode('ascii')
+
+
+def _encode_base45_python(data: bytes) -> str:
+    """
+    RFC 9285 Base45 encoding without NumPy.
+    
+    Byte pairs are unpacked to 16-bit words in one struct call, each digit
+    position is written into a preallocated bytearray with a strided slice
+    assignment, and the digits are mapped to ASCII with one bytes.translate.
+    """
+    n = len(data)
+    pairs = n // 2
+    words = struct.unpack_from(f">{pairs}H", data)
+    used = pairs * 3
+    
+    # Output size is known up front: 3 digits per pair, 2 for a trailing byte
+    out = bytearray(used + (2 if n % 2 else 0))
+    out[0:used:3] = bytes([w % 45 for w in words])
+    out[1:used:3] = bytes([w // 45 % 45 for w in words])
+    out[2:used:3] = bytes([w // 2025 for w in words])
+    if n % 2:
+        out[used], out[used + 1] = data[-1] % 45, data[-1] // 45
+    
+    return out.translate(_B45_ENCODE_TABLE).decode('ascii')
+
+
+def _encode_base45_numpy(data: bytes) -> str:
+    """
+    Vectorized RFC 9285 Base45 encoding.
+    
+    Byte pairs are viewed as big-endian uint16 words and each digit
+    position is written into one preallocated uint8 buffer with strided
+    assignments, which is then mapped through the alphabet in place. A
+    trailing byte yields two digits.
+    """
+    n = len(data)
+    full = n - n % 2
+    words = np.frombuffer(data, np.uint8, count=full).view('>u2')
+    used = full // 2 * 3
+    
+    digits = np.empty(used + (2 if n % 2 else 0), np.uint8)
+    digits[0:used:3] = words % 45
+    digits[1:used:3] = words // 45 % 45
+    digits[2:used:3] = words // 2025
+    if n % 2:
+        digits[used:] = data[-1] % 45, data[-1] // 45
+    np.take(_B45_ALPHABET_NP, digits, out=digits)
+    return digits.tobytes().decode('ascii')
+
+
+def _decode_base45_numpy(encoded: str) -> bytes:
+    """
+    Vectorized RFC 9285 Base45 decoding.
+    
+    Characters are mapped to digit values through a 256-entry table, and
+    each triplet is combined as a + 45*b + 2025*c across the whole buffer.
+    A trailing pair yields one byte.
+    
+    Raises:
+        ValueError: On characters outside the alphabet, out-of-range
+                    groups, or a length that leaves a single character
+    """
+    # Non-ASCII characters become '?', which is also invalid
+    values = _B45_DECODE_LUT_NP[np.frombuffer(encoded.encode('ascii', 'replace'), np.uint8)]
+    n = len(values)
+    if n % 3 == 1:
+        raise ValueError("Invalid Base45 encoding: incomplete group")
+    if (values == _B45_INVALID).any():
+        raise ValueError(f"Invalid Base45 character: {encoded[int(np.argmax(values == _B45_INVALID))]}")
+    
+    full = n - n % 3
+    groups = values[:full].reshape(-1, 3).astype(np.uint32)
+    words = groups[:, 0] + groups[:, 1] * 45 + groups[:, 2] * 2025
+    tail = int(values[full]) + int(values[full + 1]) * 45 if n % 3 else 0
+    if (full and words.max() > 0xFFFF) or tail > 0xFF:
+        raise ValueError("Invalid Base45 encoding: value too large")
+    
+    out = words.astype('>u2').tobytes()
+    return out + bytes((tail,)) if n % 3 else out
+
 
 def encode_base45(data: bytes) -> str:
     """
@@ -38,18 +205,18 @@ def encode_base45(data: bytes) -> str:
     Raises:
         ValueError: If encoding fails
     """
-    if not isinstance(data, bytes):
-        raise ValueError("data must be bytes")
-    
-    if HAS_BASE45_LIB:
-        # Use library if available
-        try:
-            return base45.b45encode(data).decode('ascii')
-        except Exception as e:
-            raise ValueError(f"Base45 encoding failed: {str(e)}")
-    else:
-        # Fallback implementation
-        return _encode_base45_manual(data)
+    if __debug__:
+        if not isinstance(data, bytes):
+            raise ValueError("data must be bytes")
+    
+    try:
+        if _encode_core is not None:
+            return _encode_base45_numba(data)
+        if HAS_NUMPY:
+            return _encode_base45_numpy(data)
+        return _encode_base45_python(data)
+    except Exception as e:
+        raise ValueError(f"Base45 encoding failed: {str(e)}")
 
 
 def decode_base45(encoded: str) -> bytes:
@@ -65,96 +232,16 @@ def decode_base45(encoded: str) -> bytes:
     Raises:
         ValueError: If decoding fails or string contains invalid characters
     """
-    if not isinstance(encoded, str):
-        raise ValueError("encoded must be a string")
-    
-    if HAS_BASE45_LIB:
-        # Use library if available
-        try:
-            return base45.b45decode(encoded)
-        except Exception as e:
-            raise ValueError(f"Base45 decoding failed: {str(e)}")
-    else:
-        # Fallback implementation
-        return _decode_base45_manual(encoded)
-
-
-def _encode_base45_manual(data: bytes) -> str:
-    """
-    Manual Base45 encoding implementation.
-    
-    This is a fallback if the base45 library is not available.
-    Implements RFC 9285 Base45 encoding.
-    """
-    if len(data) == 0:
-        return ""
-    
-    result = []
-    # Process data in pairs
-    for i in range(0, len(data), 2):
-        if i + 1 < len(data):
-            # Two bytes
-            value = data[i] * 256 + data[i + 1]
-            # Convert to base 45 (3 digits)
-            result.append(BASE45_CHARS[value % 45])
-            value //= 45
-            result.append(BASE45_CHARS[value % 45])
-            value //= 45
-            result.append(BASE45_CHARS[value])
-        else:
-            # Single byte
-            value = data[i]
-            result.append(BASE45_CHARS[value % 45])
-            if value >= 45:
-                result.append(BASE45_CHARS[value // 45])
-    
-    return ''.join(result)
-
-
-def _decode_base45_manual(encoded: str) -> bytes:
-    """
-    Manual Base45 decoding implementation.
+    if __debug__:
+        if not isinstance(encoded, str):
+            raise ValueError("encoded must be a string")
     
-    This is a fallback if the base45 library is not available.
-    Implements RFC 9285 Base45 decoding.
-    """
-    if len(encoded) == 0:
-        return b""
-    
-    # Create reverse lookup
-    char_to_value = {char: i for i, char in enumerate(BASE45_CHARS)}
-    
-    # Validate all characters are in Base45 set
-    for char in encoded:
-        if char not in char_to_value:
-            raise ValueError(f"Invalid Base45 character: {char}")
-    
-    result = []
-    i = 0
-    while i < len(encoded):
-        if i + 2 < len(encoded):
-            # Three characters -> two bytes
-            value = (char_to_value[encoded[i]] +
-                    char_to_value[encoded[i + 1]] * 45 +
-                    char_to_value[encoded[i + 2]] * 45 * 45)
-            if value > 65535:
-                raise ValueError("Invalid Base45 encoding: value too large")
-            result.append(value // 256)
-            result.append(value % 256)
-            i += 3
-        elif i + 1 < len(encoded):
-            # Two characters -> one byte
-            value = char_to_value[encoded[i]] + char_to_value[encoded[i + 1]] * 45
-            if value > 255:
-                raise ValueError("Invalid Base45 encoding: value too large")
-            result.append(value)
-            i += 2
-        else:
-            # Single character -> one byte
-            result.append(char_to_value[encoded[i]])
-            i += 1
-    
-    return bytes(result)
+    try:
+        if HAS_NUMPY:
+            return _decode_base45_numpy(encoded)
+        return _b45decode(encoded)
+    except Exception as e:
+        raise ValueError(f"Base45 decoding failed: {str(e)}")
 
 
 # Example usage and testing
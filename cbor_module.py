@@ -2,9 +2,13 @@
 CBOR Envelope Module
 
 This module handles:
-- Creating CBOR envelopes from encryption components
+- Creating CBOR envelopes from encryption components (or in place,
+  around ciphertext already written to a buffer)
 - Parsing CBOR envelopes to extract components
-- Validating envelope structure
+- Chunk metadata (message id, index, total) for envelopes that are one
+  piece of a longer message, and its AES-GCM associated data
+- Validating envelope structure (full for parse_envelope, minimal for
+  parse_envelope_fast on the decrypt hot path)
 
 CBOR (Concise Binary Object Representation) is used to package:
 - Encrypted session key (RSA-OAEP encrypted)
@@ -12,11 +16,20 @@ CBOR (Concise Binary Object Representation) is used to package:
 - Authentication tag (from AES-GCM)
 - Ciphertext (AES-GCM encrypted data)
 - Metadata (version, algorithms, etc.)
+- Chunk position, for one chunk of a multi-envelope message (optional)
 """
 
 import cbor2
 from typing import Dict, Any, Tuple
 
+# cbor2 silently falls back to its pure-Python codec (cbor2._encoder /
+# cbor2._decoder) when the compiled extension is unavailable
+_cbor_dumps = cbor2.dumps
+_cbor_loads = cbor2.loads
+HAS_CBOR2_EXTENSION = _cbor_loads.__module__ != "cbor2._decoder"
+if not HAS_CBOR2_EXTENSION:
+    print("Warning: cbor2 compiled extension not available. Using pure-Python CBOR codec.")
+
 
 # Protocol version
 ENVELOPE_VERSION = 1
@@ -25,9 +38,86 @@ ENVELOPE_VERSION = 1
 ALGORITHM_RSA3072_OAEP_AES256_GCM = "RSA3072-OAEP+AES256-GCM"
 COMPRESSION_ZSTD = "zstd"
 
+# Byte-string fields carried by every envelope
+_BINARY_FIELDS = ("encrypted_key", "iv", "tag", "ciphertext")
+
+# Size of the random id shared by all chunks of one message
+CHUNK_MESSAGE_ID_SIZE = 16
+
+# The envelope schema is fixed, so everything except the byte strings (and a
+# non-default compression name) is encoded once here. create_envelope only
+# splices length headers and payloads between these pre-encoded pieces.
+_ENVELOPE_HEAD = (
+    _cbor_dumps("version") + _cbor_dumps(ENVELOPE_VERSION)
+    + _cbor_dumps("algorithm") + _cbor_dumps(ALGORITHM_RSA3072_OAEP_AES256_GCM)
+    + _cbor_dumps("compression")
+)
+_COMPRESSION_ZSTD_CBOR = _cbor_dumps(COMPRESSION_ZSTD)
+_KEY_ENCRYPTED_KEY, _KEY_IV, _KEY_TAG, _KEY_CIPHERTEXT = (
+    _cbor_dumps(field) for field in _BINARY_FIELDS
+)
+_KEY_CHUNK = _cbor_dumps("chunk")
+_MAP_7, _MAP_8 = b"\xa7", b"\xa8"  # map headers without / with "chunk"
+
+
+def _bstr_head(length: int) -> bytes:
+    """
+    Encode a CBOR byte-string header (major type 2) for the given length.
+    
+    Uses the shortest form, matching cbor2's canonical length encoding.
+    """
+    if length < 24:
+        return bytes((0x40 | length,))
+    if length < 0x100:
+        return bytes((0x58, length))
+    if length < 0x10000:
+        return b"\x59" + length.to_bytes(2, "big")
+    if length < 0x100000000:
+        return b"\x5a" + length.to_bytes(4, "big")
+    return b"\x5b" + length.to_bytes(8, "big")
+
+
+# iv and tag have fixed, validated sizes, so their headers are constant too
+_KEY_IV_HEAD = _KEY_IV + _bstr_head(12)
+_KEY_TAG_HEAD = _KEY_TAG + _bstr_head(16)
+
+
+def chunk_associated_data(chunk) -> bytes:
+    """
+    Validate chunk metadata and return its CBOR encoding.
+    
+    The same bytes are stored as the envelope's "chunk" field and passed to
+    AES-GCM as associated data, so a chunk's message id and position are
+    covered by its authentication tag: an envelope moved to another
+    position, or into another message, fails to decrypt.
+    
+    Args:
+        chunk: (message_id, index, total) - the 16-byte random id shared by
+            all chunks of a message, this chunk's 0-based index and the
+            number of chunks
+    
+    Returns:
+        CBOR-encoded [message_id, index, total] (bytes)
+    
+    Raises:
+        ValueError: If chunk is malformed
+    """
+    try:
+        message_id, index, total = chunk
+    except (TypeError, ValueError):
+        raise ValueError("chunk must be (message_id, index, total)")
+    if not isinstance(message_id, bytes) or len(message_id) != CHUNK_MESSAGE_ID_SIZE:
+        raise ValueError(f"chunk message_id must be {CHUNK_MESSAGE_ID_SIZE} bytes")
+    if (not isinstance(index, int) or not isinstance(total, int)
+            or isinstance(index, bool) or isinstance(total, bool)
+            or not 0 <= index < total):
+        raise ValueError(f"Invalid chunk position: {index} of {total}")
+    return _cbor_dumps([message_id, index, total])
+
 
 def create_envelope(encrypted_key: bytes, iv: bytes, tag: bytes, 
-                   ciphertext: bytes, compression: str = COMPRESSION_ZSTD) -> bytes:
+                   ciphertext: bytes, compression: str = COMPRESSION_ZSTD,
+                   chunk=None) -> bytes:
     """
     Create a CBOR envelope containing all encryption components.
     
@@ -39,6 +129,8 @@ def create_envelope(encrypted_key: bytes, iv: bytes, tag: bytes,
         "encrypted_key": <bytes>,  # RSA-encrypted session key
         "iv": <bytes>,             # 12-byte IV for AES-GCM
         "tag": <bytes>,            # 16-byte authentication tag
+        "chunk": [<bytes>, int, int],  # Only for chunked messages:
+                                   # message id, index, total
         "ciphertext": <bytes>      # Encrypted data
     }
     
@@ -48,6 +140,8 @@ def create_envelope(encrypted_key: bytes, iv: bytes, tag: bytes,
         tag: Authentication tag from AES-GCM (16 bytes)
         ciphertext: Encrypted data (bytes)
         compression: Compression algorithm used (default: "zstd")
+        chunk: (message_id, index, total) for one chunk of a longer
+            message (optional, see chunk_associated_data)
     
     Returns:
         CBOR-encoded envelope as bytes
@@ -55,33 +149,120 @@ def create_envelope(encrypted_key: bytes, iv: bytes, tag: bytes,
     Raises:
         ValueError: If input validation fails
     """
-    # Validate inputs
-    if not isinstance(encrypted_key, bytes) or len(encrypted_key) == 0:
+    # Validate inputs (type checks are stripped under python -O; a non-bytes
+    # field then fails in the join below)
+    if __debug__:
+        if not isinstance(ciphertext, bytes):
+            raise ValueError("ciphertext must be bytes")
+    
+    return b"".join((
+        _envelope_header(encrypted_key, iv, tag, len(ciphertext), compression, chunk),
+        ciphertext,
+    ))
+
+
+def _envelope_header(encrypted_key: bytes, iv: bytes, tag: bytes,
+                     ciphertext_length: int, compression: str, chunk=None) -> bytes:
+    """
+    Validate the fixed-size fields and encode everything before the ciphertext.
+    
+    ciphertext is the last entry of the map, so an envelope is exactly this
+    header followed by the ciphertext bytes.
+    """
+    if __debug__:
+        for field, value in zip(_BINARY_FIELDS, (encrypted_key, iv, tag)):
+            if not isinstance(value, bytes):
+                raise ValueError(f"{field} must be bytes")
+    if len(encrypted_key) == 0:
         raise ValueError("encrypted_key must be non-empty bytes")
-    if not isinstance(iv, bytes) or len(iv) != 12:
-        raise ValueError(f"iv must be 12 bytes, got {len(iv) if isinstance(iv, bytes) else 'non-bytes'}")
-    if not isinstance(tag, bytes) or len(tag) != 16:
-        raise ValueError(f"tag must be 16 bytes, got {len(tag) if isinstance(tag, bytes) else 'non-bytes'}")
-    if not isinstance(ciphertext, bytes):
-        raise ValueError("ciphertext must be bytes")
-    
-    # Create envelope dictionary
-    envelope = {
-        "version": ENVELOPE_VERSION,
-        "algorithm": ALGORITHM_RSA3072_OAEP_AES256_GCM,
-        "compression": compression,
-        "encrypted_key": encrypted_key,
-        "iv": iv,
-        "tag": tag,
-        "ciphertext": ciphertext
-    }
+    if len(iv) != 12:
+        raise ValueError(f"iv must be 12 bytes, got {len(iv)}")
+    if len(tag) != 16:
+        raise ValueError(f"tag must be 16 bytes, got {len(tag)}")
     
-    # Encode to CBOR
+    # Encode to CBOR by splicing the pre-encoded fixed parts with the payloads
     try:
-        cbor_data = cbor2.dumps(envelope)
-        return cbor_data
+        if compression == COMPRESSION_ZSTD:
+            compression_cbor = _COMPRESSION_ZSTD_CBOR
+        else:
+            compression_cbor = _cbor_dumps(compression)
     except Exception as e:
         raise ValueError(f"Failed to encode envelope to CBOR: {str(e)}")
+    
+    if chunk is None:
+        map_head, chunk_field = _MAP_7, b""
+    else:
+        map_head, chunk_field = _MAP_8, _KEY_CHUNK + chunk_associated_data(chunk)
+    
+    return b"".join((
+        map_head, _ENVELOPE_HEAD, compression_cbor,
+        _KEY_ENCRYPTED_KEY, _bstr_head(len(encrypted_key)), encrypted_key,
+        _KEY_IV_HEAD, iv,
+        _KEY_TAG_HEAD, tag,
+        chunk_field,
+        _KEY_CIPHERTEXT, _bstr_head(ciphertext_length),
+    ))
+
+
+def envelope_header_space(encrypted_key_length: int, compression: str = COMPRESSION_ZSTD,
+                          chunk=None) -> int:
+    """
+    Return the number of bytes to reserve ahead of the ciphertext for
+    create_envelope_into.
+    
+    This is the header size for the largest possible ciphertext length,
+    so it is enough whatever length the ciphertext ends up with.
+    
+    Args:
+        encrypted_key_length: Length of the RSA-encrypted session key
+        compression: Compression algorithm used (default: "zstd")
+        chunk: Chunk metadata the envelope will carry (optional)
+    
+    Returns:
+        Number of bytes to reserve
+    """
+    return len(_envelope_header(b"\0" * encrypted_key_length, b"\0" * 12, b"\0" * 16,
+                                1 << 32, compression, chunk))
+
+
+def create_envelope_into(buf: bytearray, header_space: int, encrypted_key: bytes,
+                         iv: bytes, tag: bytes, compression: str = COMPRESSION_ZSTD,
+                         chunk=None) -> bytearray:
+    """
+    Turn a buffer holding reserved space plus ciphertext into a CBOR envelope, in place.
+    
+    buf must consist of header_space reserved bytes (see
+    envelope_header_space) followed by the ciphertext. The header is
+    written at the end of the reservation, directly in front of the
+    ciphertext, and the unused start of the buffer is removed, so the
+    ciphertext itself is never copied. The result is byte-identical to
+    create_envelope.
+    
+    Args:
+        buf: Reserved space followed by the ciphertext
+        header_space: Number of reserved bytes at the start of buf
+        encrypted_key: RSA-OAEP encrypted session key (bytes)
+        iv: Initialization vector for AES-GCM (12 bytes)
+        tag: Authentication tag from AES-GCM (16 bytes)
+        compression: Compression algorithm used (default: "zstd")
+        chunk: (message_id, index, total) for one chunk of a longer
+            message (optional)
+    
+    Returns:
+        buf, now containing exactly the CBOR-encoded envelope
+    
+    Raises:
+        ValueError: If input validation fails or header_space is too small
+    """
+    header = _envelope_header(encrypted_key, iv, tag, len(buf) - header_space, compression, chunk)
+    start = header_space - len(header)
+    if start < 0:
+        raise ValueError(f"header_space too small: need {len(header)} bytes, got {header_space}")
+    
+    buf[start:header_space] = header
+    # Deleting from the front of a bytearray only moves its start pointer
+    del buf[:start]
+    return buf
 
 
 def parse_envelope(cbor_data: bytes) -> Dict[str, Any]:
@@ -100,50 +281,95 @@ def parse_envelope(cbor_data: bytes) -> Dict[str, Any]:
             "encrypted_key": bytes,
             "iv": bytes,
             "tag": bytes,
+            "chunk": [bytes, int, int],  # chunked messages only
             "ciphertext": bytes
         }
     
     Raises:
         ValueError: If parsing fails or envelope is invalid
     """
-    if not isinstance(cbor_data, bytes):
-        raise ValueError("cbor_data must be bytes")
+    if __debug__:
+        if not isinstance(cbor_data, bytes):
+            raise ValueError("cbor_data must be bytes")
     
     try:
-        envelope = cbor2.loads(cbor_data)
+        envelope = _cbor_loads(cbor_data)
     except Exception as e:
         raise ValueError(f"Failed to parse CBOR data: {str(e)}")
     
-    # Validate envelope structure
-    required_fields = ["version", "algorithm", "compression", "encrypted_key", "iv", "tag", "ciphertext"]
-    for field in required_fields:
-        if field not in envelope:
-            raise ValueError(f"Missing required field in envelope: {field}")
+    # Validate envelope structure: a missing field surfaces as KeyError
+    try:
+        version = envelope["version"]
+        algorithm = envelope["algorithm"]
+        compression = envelope["compression"]
+        encrypted_key = envelope["encrypted_key"]
+        iv = envelope["iv"]
+        tag = envelope["tag"]
+        ciphertext = envelope["ciphertext"]
+    except KeyError as e:
+        raise ValueError(f"Missing required field in envelope: {e.args[0]}")
+    except TypeError:
+        raise ValueError("Envelope must be a CBOR map")
+    
+    # Validate field types (stripped under python -O)
+    if __debug__:
+        if not isinstance(version, int):
+            raise ValueError("version must be an integer")
+        if not isinstance(algorithm, str):
+            raise ValueError("algorithm must be a string")
+        if not isinstance(compression, str):
+            raise ValueError("compression must be a string")
+        for field, value in zip(_BINARY_FIELDS, (encrypted_key, iv, tag, ciphertext)):
+            if not isinstance(value, bytes):
+                raise ValueError(f"{field} must be bytes")
     
-    # Validate field types and values
-    if not isinstance(envelope["version"], int):
-        raise ValueError("version must be an integer")
-    if envelope["version"] != ENVELOPE_VERSION:
-        raise ValueError(f"Unsupported envelope version: {envelope['version']}")
+    # Validate values
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version: {version}")
+    if algorithm != ALGORITHM_RSA3072_OAEP_AES256_GCM:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
     
-    if not isinstance(envelope["algorithm"], str):
-        raise ValueError("algorithm must be a string")
-    if envelope["algorithm"] != ALGORITHM_RSA3072_OAEP_AES256_GCM:
-        raise ValueError(f"Unsupported algorithm: {envelope['algorithm']}")
+    # Validate sizes
+    if len(iv) != 12:
+        raise ValueError(f"iv must be 12 bytes, got {len(iv)}")
+    if len(tag) != 16:
+        raise ValueError(f"tag must be 16 bytes, got {len(tag)}")
+    if "chunk" in envelope:
+        chunk_associated_data(envelope["chunk"])
     
-    if not isinstance(envelope["compression"], str):
-        raise ValueError("compression must be a string")
+    return envelope
+
+
+def parse_envelope_fast(cbor_data: bytes) -> Dict[str, Any]:
+    """
+    Parse a CBOR envelope with only the checks the decrypt path relies on.
     
-    # Validate binary fields
-    for field in ["encrypted_key", "iv", "tag", "ciphertext"]:
-        if not isinstance(envelope[field], bytes):
-            raise ValueError(f"{field} must be bytes")
+    Unlike parse_envelope, field presence, types and iv/tag sizes are not
+    validated here: a missing field raises KeyError when the caller reads
+    it, and the RSA/AES layers reject wrongly typed or sized values. The
+    version and algorithm are still checked so a future envelope format is
+    never decrypted as version 1.
     
-    # Validate sizes
-    if len(envelope["iv"]) != 12:
-        raise ValueError(f"iv must be 12 bytes, got {len(envelope['iv'])}")
-    if len(envelope["tag"]) != 16:
-        raise ValueError(f"tag must be 16 bytes, got {len(envelope['tag'])}")
+    Args:
+        cbor_data: CBOR-encoded envelope (bytes)
+    
+    Returns:
+        Dictionary of envelope fields (see parse_envelope)
+    
+    Raises:
+        ValueError: If parsing fails or the version/algorithm is unsupported
+    """
+    try:
+        envelope = _cbor_loads(cbor_data)
+        version = envelope.get("version")
+        algorithm = envelope.get("algorithm")
+    except Exception as e:
+        raise ValueError(f"Failed to parse CBOR data: {str(e)}")
+    
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version: {version}")
+    if algorithm != ALGORITHM_RSA3072_OAEP_AES256_GCM:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
     
     return envelope
 
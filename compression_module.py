@@ -3,7 +3,10 @@ zstd Compression Module
 
 This module handles:
 - Compressing data with zstd (Zstandard)
+- Compressing data to a stream of chunks
 - Decompressing data with zstd
+- Decompressing zstd data supplied in chunks (streaming)
+- Training zstd dictionaries for small payloads
 
 zstd is a fast, modern compression algorithm that provides:
 - High compression ratio
@@ -16,46 +19,139 @@ Why compress before encryption?
 - Trade-off: Compression time vs. size reduction
 """
 
+import threading
 import zstandard as zstd
 
 
-def compress_data(data: bytes, level: int = 3) -> bytes:
+# Default compression level. QR capacity is the binding constraint, so a
+# high level is worth it: level 15 gets close to level 22's ratio and still
+# compresses QR-sized payloads (a few KB) in well under a millisecond.
+DEFAULT_LEVEL = 15
+
+# Worker threads for compression (-1 = one per CPU). zstd only splits inputs
+# larger than its job size (several hundred KB), so small payloads are
+# unaffected.
+COMPRESSION_THREADS = -1
+
+# Compression/decompression contexts are expensive to create (each allocates
+# its own working memory), so they are created once and reused. zstd contexts
+# must not be used from two threads at once, hence one set per thread.
+_contexts = threading.local()
+
+
+def _get_compressor(level: int, dictionary=None) -> zstd.ZstdCompressor:
+    """Return this thread's reusable compressor for the given level and dictionary."""
+    compressors = getattr(_contexts, "compressors", None)
+    if compressors is None:
+        compressors = _contexts.compressors = {}
+    compressor = compressors.get((level, dictionary))
+    if compressor is None:
+        compressor = compressors[(level, dictionary)] = zstd.ZstdCompressor(
+            level=level, dict_data=dictionary, threads=COMPRESSION_THREADS)
+    return compressor
+
+
+def _get_decompressor(dictionary=None) -> zstd.ZstdDecompressor:
+    """Return this thread's reusable decompressor for the given dictionary."""
+    decompressors = getattr(_contexts, "decompressors", None)
+    if decompressors is None:
+        decompressors = _contexts.decompressors = {}
+    decompressor = decompressors.get(dictionary)
+    if decompressor is None:
+        decompressor = decompressors[dictionary] = zstd.ZstdDecompressor(dict_data=dictionary)
+    return decompressor
+
+
+def train_dictionary(samples: list, dict_size: int = 16 * 1024) -> zstd.ZstdCompressionDict:
+    """
+    Train a zstd dictionary on a corpus of sample payloads.
+    
+    A dictionary primes the compressor with content typical of the app's
+    payloads, which can shrink inputs under ~1 KB several times over. Data
+    compressed with a dictionary can only be decompressed with the same
+    dictionary, so sender and receiver must share it.
+    
+    Args:
+        samples: List of sample payloads (bytes); zstd needs a few hundred
+                 or more for a useful dictionary
+        dict_size: Maximum dictionary size in bytes (default: 16 KB)
+    
+    Returns:
+        Trained dictionary, to pass as `dictionary` to compress_data /
+        decompress_data (save with .as_bytes(), reload with
+        zstd.ZstdCompressionDict(data))
+    
+    Raises:
+        ValueError: If training fails (e.g. too few samples)
+    """
+    try:
+        return zstd.train_dictionary(dict_size, samples)
+    except zstd.ZstdError as e:
+        raise ValueError(f"zstd dictionary training failed: {str(e)}")
+
+
+def compress_data(data: bytes, level: int = DEFAULT_LEVEL, dictionary=None) -> bytes:
     """
     Compress data using zstd (Zstandard).
     
     Args:
-        data: Data to compress (bytes)
-        level: Compression level (1-22, default: 3)
+        data: Data to compress (bytes or any buffer-protocol object, e.g. mmap)
+        level: Compression level (1-22, default: 15)
                Higher = better compression but slower
-               Level 3 is a good balance
+        dictionary: Optional zstd.ZstdCompressionDict (see train_dictionary)
     
     Returns:
         Compressed data (bytes)
     
     Raises:
-        ValueError: If compression fails
+        ValueError: If compression fails (including non-buffer input)
     """
-    if not isinstance(data, bytes):
-        raise ValueError("data must be bytes")
-    
     if len(data) == 0:
         return b""
     
     try:
-        # Create compressor with specified level
-        compressor = zstd.ZstdCompressor(level=level)
-        compressed = compressor.compress(data)
+        # Reuse this thread's compressor for the specified level
+        compressed = _get_compressor(level, dictionary).compress(data)
         return compressed
     except Exception as e:
         raise ValueError(f"zstd compression failed: {str(e)}")
 
 
-def decompress_data(compressed_data: bytes) -> bytes:
+def compress_stream(data, level: int = DEFAULT_LEVEL, dictionary=None):
+    """
+    Compress data with zstd, yielding the compressed frame in chunks.
+    
+    Produces the same frame as compress_data (content size included, so
+    decompress_data can still read it) without building it as one buffer;
+    each chunk can be consumed (e.g. encrypted) as soon as it is produced.
+    
+    Args:
+        data: Data to compress (any buffer-protocol object)
+        level: Compression level (1-22, default: 15)
+        dictionary: Optional zstd.ZstdCompressionDict (see train_dictionary)
+    
+    Yields:
+        Compressed data chunks (bytes); nothing for empty input
+    
+    Raises:
+        ValueError: If compression fails
+    """
+    if len(data) == 0:
+        return
+    
+    try:
+        yield from _get_compressor(level, dictionary).read_to_iter(data, size=len(data))
+    except zstd.ZstdError as e:
+        raise ValueError(f"zstd compression failed: {str(e)}")
+
+
+def decompress_data(compressed_data: bytes, dictionary=None) -> bytes:
     """
     Decompress data using zstd (Zstandard).
     
     Args:
         compressed_data: Compressed data (bytes)
+        dictionary: Dictionary the data was compressed with, if any
     
     Returns:
         Decompressed data (bytes)
@@ -70,14 +166,48 @@ def decompress_data(compressed_data: bytes) -> bytes:
         return b""
     
     try:
-        # Create decompressor
-        decompressor = zstd.ZstdDecompressor()
-        decompressed = decompressor.decompress(compressed_data)
+        # Reuse this thread's decompressor
+        decompressed = _get_decompressor(dictionary).decompress(compressed_data)
         return decompressed
     except Exception as e:
         raise ValueError(f"zstd decompression failed: {str(e)}")
 
 
+def decompress_stream(chunks, dictionary=None) -> bytes:
+    """
+    Decompress zstd data supplied as an iterable of chunks.
+    
+    Each chunk is fed to the decompressor as soon as it is produced, so the
+    compressed input never has to be assembled into one buffer.
+    
+    Args:
+        chunks: Iterable of compressed data chunks (bytes-like)
+        dictionary: Dictionary the data was compressed with, if any
+    
+    Returns:
+        Decompressed data (bytes)
+    
+    Raises:
+        ValueError: If decompression fails (corrupted or truncated data, etc.)
+    """
+    decompressor = _get_decompressor(dictionary).decompressobj()
+    output = []
+    received = False
+    
+    try:
+        for chunk in chunks:
+            if chunk:
+                received = True
+                output.append(decompressor.decompress(chunk))
+    except zstd.ZstdError as e:
+        raise ValueError(f"zstd decompression failed: {str(e)}")
+    
+    if received and not decompressor.eof:
+        raise ValueError("zstd decompression failed: did not decompress full frame")
+    
+    return b"".join(output)
+
+
 def get_compression_ratio(original: bytes, compressed: bytes) -> float:
     """
     Calculate compression ratio.
@@ -104,7 +234,7 @@ if __name__ == "__main__":
     
     # Compress
     print("\nCompressing with zstd...")
-    compressed = compress_data(test_data, level=3)
+    compressed = compress_data(test_data)
     print(f"Compressed data length: {len(compressed)} bytes")
     
     ratio = get_compression_ratio(test_data, compressed)
@@ -127,7 +257,7 @@ if __name__ == "__main__":
     random_data = os.urandom(1000)
     print(f"Random data length: {len(random_data)} bytes")
     
-    compressed_random = compress_data(random_data, level=3)
+    compressed_random = compress_data(random_data)
     print(f"Compressed random data length: {len(compressed_random)} bytes")
     ratio_random = get_compression_ratio(random_data, compressed_random)
     print(f"Compression ratio: {ratio_random:.2%}")
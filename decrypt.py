@@ -2,24 +2,35 @@
 Main Decryption Orchestrator
 
 This module orchestrates the complete decryption process:
-1. Decode Base45 string
+1. Decode Base45 string (skipped for raw envelope bytes from QR byte mode)
 2. Parse CBOR envelope
 3. Decrypt session key with RSA-3072-OAEP
 4. Decrypt ciphertext with AES-256-GCM
-5. Decompress with zstd
+5. Decompress with zstd (streamed together with step 4)
 6. Output original data
 
 This is the main entry point for decryption operations.
 """
 
+import logging
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from rsa_module import load_private_key, decrypt_with_rsa_oaep
-from aes_module import decrypt_with_aes_gcm
-from compression_module import decompress_data
-from cbor_module import parse_envelope
+from aes_module import decrypt_with_aes_gcm, decrypt_with_aes_gcm_stream
+from compression_module import decompress_data, decompress_stream
+from cbor_module import parse_envelope_fast, chunk_associated_data
 from base45_module import decode_base45
 
+logger = logging.getLogger(__name__)
+
+# Ciphertext is decrypted and decompressed in slices of this size
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Bytes treated as printable text by the CLI: printable ASCII plus \n \r \t
+_PRINTABLE_BYTES = bytes(range(32, 127)) + b"\n\r\t"
+
 
 def write_file_data(file_path: str, data: bytes):
     """
@@ -36,19 +47,84 @@ def write_file_data(file_path: str, data: bytes):
         f.write(data)
 
 
+def _iter_chunks(data: bytes, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Yield zero-copy slices of data.
+    
+    Args:
+        data: Data to slice (bytes)
+        chunk_size: Maximum slice length
+    
+    Yields:
+        memoryview slices of data
+    """
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def decrypt_and_decompress(ciphertext: bytes, tag: bytes, session_key: bytes, iv: bytes,
+                           associated_data: bytes = None) -> bytes:
+    """
+    Decrypt AES-256-GCM ciphertext and zstd-decompress it in one streaming pass.
+    
+    Each decrypted slice goes straight into the zstd decompressor, so the
+    compressed plaintext is never materialized as a single buffer. The result
+    is only returned once the GCM tag has been verified. Ciphertexts no
+    longer than one slice (QR-sized envelopes) are decrypted one-shot with
+    the AESGCM context cached for session_key, which all chunks of an
+    encrypt_data_chunked message share.
+    
+    Args:
+        ciphertext: AES-GCM encrypted, zstd-compressed data (bytes)
+        tag: Authentication tag (16 bytes)
+        session_key: AES key (32 bytes)
+        iv: Initialization vector (12 bytes)
+        associated_data: AES-GCM associated data (chunk metadata, optional)
+    
+    Returns:
+        Decrypted, decompressed data (bytes)
+    
+    Raises:
+        ValueError: If authentication or decompression fails
+    """
+    if len(ciphertext) <= STREAM_CHUNK_SIZE:
+        return decompress_data(decrypt_with_aes_gcm(ciphertext, tag, session_key, iv,
+                                                    associated_data))
+    
+    plaintext_chunks = decrypt_with_aes_gcm_stream(_iter_chunks(ciphertext), tag, session_key, iv,
+                                                   associated_data)
+    try:
+        return decompress_stream(plaintext_chunks)
+    except ValueError:
+        # Tampered ciphertext usually breaks zstd before the tag is checked;
+        # finish the GCM pass so an authentication failure is reported as such
+        for _ in plaintext_chunks:
+            pass
+        raise
+
+
 def decrypt_data(base45_string: str, private_key_path: str) -> bytes:
     """
     Decrypt data from Base45 string.
     
+    A chunk from encrypt.encrypt_data_chunked decrypts to just that piece;
+    use decrypt_batch to check and reassemble a whole chunked message.
+    
     Complete decryption flow:
-    1. Decode Base45 string
+    1. Decode Base45 string (raw envelope bytes, as produced by
+       encrypt_data in byte mode, are used as-is)
     2. Parse CBOR envelope
     3. Decrypt session key with RSA-3072-OAEP
     4. Decrypt ciphertext with AES-256-GCM
-    5. Decompress with zstd
+    5. Decompress with zstd (streamed together with step 4)
+    
+    Progress is reported through this module's logger at DEBUG level
+    (shown by the command-line interface, silent by default).
     
     Args:
-        base45_string: Base45-encoded encrypted data
+        base45_string: Base45-encoded encrypted data, or the CBOR envelope
+            itself (bytes) for byte-mode QR codes
         private_key_path: Path to recipient's private key PEM file
     
     Returns:
@@ -58,65 +134,159 @@ def decrypt_data(base45_string: str, private_key_path: str) -> bytes:
         ValueError: If decryption fails (wrong key, tampered data, etc.)
         FileNotFoundError: If private key file doesn't exist
     """
-    print("Starting decryption process...")
+    return _decrypt_envelope(base45_string, private_key_path)[0]
+
+
+def _decrypt_envelope(base45_string: str, private_key_path: str) -> tuple:
+    """
+    decrypt_data, also returning the envelope's chunk metadata.
+    
+    Returns:
+        tuple: (decrypted data (bytes), [message_id, index, total] or None)
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Starting decryption process...")
     
     # Step 1: Decode Base45
-    print("Step 1: Decoding Base45 string...")
-    try:
-        cbor_data = decode_base45(base45_string)
-        print(f"  CBOR data size: {len(cbor_data)} bytes")
-    except Exception as e:
-        raise ValueError(f"Base45 decoding failed: {str(e)}")
+    if isinstance(base45_string, (bytes, bytearray)):
+        if debug:
+            logger.debug("Step 1: Raw CBOR envelope (byte mode), skipping Base45...")
+        cbor_data = bytes(base45_string)
+    else:
+        if debug:
+            logger.debug("Step 1: Decoding Base45 string...")
+        try:
+            cbor_data = decode_base45(base45_string)
+        except Exception as e:
+            raise ValueError(f"Base45 decoding failed: {str(e)}")
+    if debug:
+        logger.debug("  CBOR data size: %d bytes", len(cbor_data))
     
     # Step 2: Parse CBOR envelope
-    print("\nStep 2: Parsing CBOR envelope...")
+    if debug:
+        logger.debug("\nStep 2: Parsing CBOR envelope...")
     try:
-        envelope = parse_envelope(cbor_data)
-        print(f"  Version: {envelope['version']}")
-        print(f"  Algorithm: {envelope['algorithm']}")
-        print(f"  Compression: {envelope['compression']}")
-        print(f"  Encrypted key size: {len(envelope['encrypted_key'])} bytes")
-        print(f"  IV size: {len(envelope['iv'])} bytes")
-        print(f"  Tag size: {len(envelope['tag'])} bytes")
-        print(f"  Ciphertext size: {len(envelope['ciphertext'])} bytes")
+        envelope = parse_envelope_fast(cbor_data)
+        encrypted_key = envelope['encrypted_key']
+        iv = envelope['iv']
+        tag = envelope['tag']
+        ciphertext = envelope['ciphertext']
+        chunk = envelope.get('chunk')
+        associated_data = None if chunk is None else chunk_associated_data(chunk)
+    except KeyError as e:
+        raise ValueError(f"CBOR envelope parsing failed: Missing required field in envelope: {e.args[0]}")
     except Exception as e:
         raise ValueError(f"CBOR envelope parsing failed: {str(e)}")
+    if debug:
+        logger.debug("  Version: %s", envelope['version'])
+        logger.debug("  Algorithm: %s", envelope['algorithm'])
+        logger.debug("  Compression: %s", envelope.get('compression'))
+        logger.debug("  Encrypted key size: %d bytes", len(encrypted_key))
+        logger.debug("  IV size: %d bytes", len(iv))
+        logger.debug("  Tag size: %d bytes", len(tag))
+        logger.debug("  Ciphertext size: %d bytes", len(ciphertext))
+        if chunk is not None:
+            logger.debug("  Chunk: %d of %d", chunk[1] + 1, chunk[2])
     
     # Step 3: Decrypt session key
-    print("\nStep 3: Decrypting session key with RSA-3072-OAEP...")
+    if debug:
+        logger.debug("\nStep 3: Decrypting session key with RSA-3072-OAEP...")
     try:
         private_key = load_private_key(private_key_path)
-        print(f"  Loaded private key from: {private_key_path}")
-        session_key = decrypt_with_rsa_oaep(envelope['encrypted_key'], private_key)
-        print(f"  Decrypted session key size: {len(session_key)} bytes")
+        session_key = decrypt_with_rsa_oaep(encrypted_key, private_key)
     except FileNotFoundError:
         raise FileNotFoundError(f"Private key file not found: {private_key_path}")
     except Exception as e:
         raise ValueError(f"RSA decryption failed: {str(e)}")
+    if debug:
+        logger.debug("  Loaded private key from: %s", private_key_path)
+        logger.debug("  Decrypted session key size: %d bytes", len(session_key))
     
-    # Step 4: Decrypt ciphertext with AES-256-GCM
-    print("\nStep 4: Decrypting with AES-256-GCM...")
+    # Step 4 & 5: Decrypt with AES-256-GCM and decompress, streamed
+    if debug:
+        logger.debug("\nStep 4: Decrypting with AES-256-GCM and decompressing with zstd...")
     try:
-        compressed_data = decrypt_with_aes_gcm(
-            envelope['ciphertext'],
-            envelope['tag'],
-            session_key,
-            envelope['iv']
-        )
-        print(f"  Decrypted (compressed) data size: {len(compressed_data)} bytes")
+        original_data = decrypt_and_decompress(ciphertext, tag, session_key, iv, associated_data)
     except Exception as e:
-        raise ValueError(f"AES decryption failed: {str(e)}")
+        raise ValueError(f"Decryption failed: {str(e)}")
+    if debug:
+        logger.debug("  Decompressed data size: %d bytes", len(original_data))
+        logger.debug("\n✅ Decryption completed successfully!")
     
-    # Step 5: Decompress
-    print("\nStep 5: Decompressing with zstd...")
-    try:
-        original_data = decompress_data(compressed_data)
-        print(f"  Decompressed data size: {len(original_data)} bytes")
-    except Exception as e:
-        raise ValueError(f"Decompression failed: {str(e)}")
+    return original_data, chunk
+
+
+def _order_chunks(results: list) -> list:
+    """
+    Check that decrypted chunks form exactly one whole message and order them.
+    
+    Args:
+        results: (data, chunk) pairs from _decrypt_envelope
+    
+    Returns:
+        List of decrypted data (bytes), in chunk index order
+    
+    Raises:
+        ValueError: If chunks are mixed with unchunked envelopes, come from
+            different messages, or any index is missing or repeated
+    """
+    if any(chunk is None for _, chunk in results):
+        raise ValueError("Cannot mix chunked and unchunked envelopes in one batch")
+    
+    message_id, _, total = results[0][1]
+    if any(chunk[0] != message_id or chunk[2] != total for _, chunk in results):
+        raise ValueError("Chunks belong to different messages")
+    if len(results) != total:
+        raise ValueError(f"Incomplete message: expected {total} chunks, got {len(results)}")
     
-    print("\n✅ Decryption completed successfully!")
-    return original_data
+    ordered = [None] * total
+    for data, (_, index, _) in results:
+        if ordered[index] is not None:
+            raise ValueError(f"Duplicate chunk: {index + 1} of {total}")
+        ordered[index] = data
+    return ordered
+
+
+def decrypt_batch(base45_strings: list, private_key_path: str, max_workers: int = None) -> list:
+    """
+    Decrypt several Base45 strings in parallel worker processes.
+    
+    Every stage of decrypt_data is CPU-bound and parts of it hold the GIL,
+    so separate processes are used rather than threads. Each worker parses
+    the private key once (load_private_key caches it) and reuses it for
+    every payload it handles.
+    
+    The chunks of an encrypt.encrypt_data_chunked message may be given in
+    any order. They must all be present exactly once and belong to the same
+    message; they are returned in message order, ready to be joined.
+    
+    Args:
+        base45_strings: List of Base45-encoded encrypted payloads
+        private_key_path: Path to recipient's private key PEM file
+        max_workers: Number of worker processes (default: CPU count)
+    
+    Returns:
+        List of decrypted data (bytes): in chunk order for a chunked
+        message, otherwise in the same order as base45_strings
+    
+    Raises:
+        ValueError: If any payload fails to decrypt, or the chunks don't
+            form exactly one complete message
+        FileNotFoundError: If private key file doesn't exist
+    """
+    if len(base45_strings) <= 1:
+        # Not worth starting a process pool
+        results = [_decrypt_envelope(s, private_key_path) for s in base45_strings]
+    else:
+        workers = min(max_workers or os.cpu_count() or 1, len(base45_strings))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_decrypt_envelope, base45_strings,
+                                        repeat(private_key_path)))
+    
+    if all(chunk is None for _, chunk in results):
+        return [data for data, _ in results]
+    return _order_chunks(results)
 
 
 def decrypt_to_file(base45_string: str, private_key_path: str, output_path: str):
@@ -162,6 +332,8 @@ if __name__ == "__main__":
         print("  python decrypt.py --file encrypted.txt recipient_private.pem output.pdf")
         sys.exit(1)
     
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s", stream=sys.stdout)
+    
     try:
         if sys.argv[1] == "--file":
             # Read Base45 string from file
@@ -184,7 +356,8 @@ if __name__ == "__main__":
         try:
             text = data.decode('utf-8')
             # If it decodes successfully, check if it looks like text
-            if all(32 <= ord(c) <= 126 or c in '\n\r\t' for c in text[:1000]):
+            # (deleting every printable byte must leave nothing behind)
+            if not data[:1000].translate(None, _PRINTABLE_BYTES):
                 print("\n" + "="*60)
                 print("DECRYPTED TEXT:")
                 print("="*60)
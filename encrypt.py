@@ -3,35 +3,89 @@ Main Encryption Orchestrator
 
 This module orchestrates the complete encryption process:
 1. Read input data (file or text)
-2. Compress with zstd
-3. Generate random AES-256 session key
-4. Encrypt data with AES-256-GCM
-5. Encrypt session key with RSA-3072-OAEP
-6. Package in CBOR envelope
-7. Encode with Base45
-8. Output Base45 string (ready for QR code)
+2. Generate random AES-256 session key
+3. Encrypt session key with RSA-3072-OAEP
+4. Compress with zstd
+5. Encrypt data with AES-256-GCM (streamed together with step 4)
+6. Package in CBOR envelope (written in place around the ciphertext)
+7. Encode with Base45 (skipped for QR byte mode)
+8. Output Base45 string or raw envelope bytes (ready for QR code)
 
 This is the main entry point for encryption operations.
 """
 
+import logging
+import mmap
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 from rsa_module import load_public_key, encrypt_with_rsa_oaep
-from aes_module import encrypt_with_aes_gcm
-from compression_module import compress_data
-from cbor_module import create_envelope
+from aes_module import (generate_session_key, generate_iv, encrypt_with_aes_gcm,
+                        encrypt_with_aes_gcm_stream, new_aes_gcm_context, _AEAD_ENGINE)
+from compression_module import compress_data, compress_stream
+from cbor_module import (create_envelope, envelope_header_space, create_envelope_into,
+                         chunk_associated_data, CHUNK_MESSAGE_ID_SIZE)
 from base45_module import encode_base45
 
 
-def read_file_data(file_path: str) -> bytes:
+logger = logging.getLogger(__name__)
+
+# Inputs up to this size (text QR payloads, encrypt_data_chunked pieces) are
+# compressed and encrypted one-shot: setting up a streaming GCM context costs
+# more than the extra copy of such a small ciphertext
+SHORT_INPUT_SIZE = 4096
+
+# Output modes for encrypt_data, named after the QR segment mode they target
+MODE_ALPHANUMERIC = "alphanumeric"
+MODE_BYTE = "byte"
+
+
+@dataclass
+class EncryptionStats:
+    """
+    Sizes recorded by encrypt_data, logged as one summary line.
+    
+    Only built when DEBUG logging is enabled, so normal encryptions pay
+    for no length bookkeeping or formatting.
+    """
+    original_size: int
+    encrypted_key_size: int
+    ciphertext_size: int
+    envelope_size: int
+    base45_length: int = None  # None in byte mode
+    
+    @property
+    def compression_ratio(self) -> float:
+        """Ciphertext size as a fraction of the original size."""
+        return self.ciphertext_size / self.original_size if self.original_size > 0 else 0
+    
+    def __str__(self) -> str:
+        parts = [
+            f"original {self.original_size} bytes",
+            f"encrypted key {self.encrypted_key_size} bytes",
+            f"ciphertext {self.ciphertext_size} bytes ({self.compression_ratio:.2%})",
+            f"CBOR envelope {self.envelope_size} bytes",
+        ]
+        if self.base45_length is not None:
+            parts.append(f"Base45 {self.base45_length} characters")
+        return ", ".join(parts)
+
+
+def read_file_data(file_path: str):
     """
     Read data from a file.
     
+    Non-empty files are memory-mapped rather than read into a bytes copy:
+    pages are loaded on demand as the compressor consumes them, so the
+    file's contents never have to be held in memory twice.
+    
     Args:
         file_path: Path to file
     
     Returns:
-        File contents as bytes
+        Read-only mmap of the file contents (b"" for an empty file)
     
     Raises:
         FileNotFoundError: If file doesn't exist
@@ -41,91 +95,220 @@ def read_file_data(file_path: str) -> bytes:
         raise FileNotFoundError(f"File not found: {file_path}")
     
     with open(file_path, 'rb') as f:
-        return f.read()
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped
+            return b""
+        # The mapping stays valid after the file is closed
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 
-def encrypt_data(data: bytes, public_key_path: str) -> str:
+def compress_and_encrypt(data: bytes, encrypted_session_key: bytes,
+                         session_key: bytes, iv: bytes, chunk=None,
+                         aes_context=None) -> tuple:
     """
-    Encrypt data using the hybrid RSA+AES system.
+    Compress, encrypt and package data as a CBOR envelope in one pass.
     
-    Complete encryption flow:
-    1. Compress data with zstd
-    2. Generate random AES-256 session key
-    3. Encrypt compressed data with AES-256-GCM
-    4. Encrypt session key with RSA-3072-OAEP
-    5. Package in CBOR envelope
-    6. Encode with Base45
+    zstd output is encrypted chunk by chunk and the ciphertext is written
+    straight into the buffer that becomes the envelope: no separate
+    compressed, ciphertext or envelope copies of the payload are made.
+    Inputs of at most SHORT_INPUT_SIZE bytes take a one-shot AESGCM path
+    instead.
     
     Args:
-        data: Data to encrypt (bytes)
-        public_key_path: Path to recipient's public key PEM file
+        data: Data to encrypt (bytes or any buffer, e.g. from read_file_data)
+        encrypted_session_key: RSA-OAEP encrypted session_key
+        session_key: AES-256 session key (32 bytes)
+        iv: AES-GCM IV (12 bytes)
+        chunk: (message_id, index, total) for one chunk of a longer
+            message; stored in the envelope and authenticated as AES-GCM
+            associated data (optional)
+        aes_context: new_aes_gcm_context(session_key), reused by the
+            one-shot path across calls with the same key (optional)
     
     Returns:
-        Base45-encoded string (ready for QR code)
+        tuple: (CBOR-encoded envelope (bytes), ciphertext length)
     
     Raises:
-        ValueError: If encryption fails
-        FileNotFoundError: If public key file doesn't exist
+        ValueError: If compression or encryption fails
     """
-    print("Starting encryption process...")
+    associated_data = None if chunk is None else chunk_associated_data(chunk)
     
-    # Step 1: Compress data
-    print("Step 1: Compressing data with zstd...")
-    try:
-        compressed_data = compress_data(data)
-        print(f"  Original size: {len(data)} bytes")
-        print(f"  Compressed size: {len(compressed_data)} bytes")
-        compression_ratio = len(compressed_data) / len(data) if len(data) > 0 else 0
-        print(f"  Compression ratio: {compression_ratio:.2%}")
-    except Exception as e:
-        raise ValueError(f"Compression failed: {str(e)}")
+    if len(data) <= SHORT_INPUT_SIZE:
+        ciphertext, tag, _, _ = encrypt_with_aes_gcm(compress_data(data), session_key, iv,
+                                                     associated_data, aes_context)
+        return create_envelope(encrypted_session_key, iv, tag, ciphertext,
+                               chunk=chunk), len(ciphertext)
     
-    # Step 2 & 3: Encrypt with AES-256-GCM
-    print("\nStep 2: Encrypting with AES-256-GCM...")
-    try:
-        ciphertext, tag, session_key, iv = encrypt_with_aes_gcm(compressed_data)
-        print(f"  Generated 256-bit session key")
-        print(f"  Generated 96-bit IV")
-        print(f"  Ciphertext size: {len(ciphertext)} bytes")
-        print(f"  Authentication tag: {len(tag)} bytes")
-    except Exception as e:
-        raise ValueError(f"AES encryption failed: {str(e)}")
+    # Room for the envelope header, written once the tag and length are known
+    header_space = envelope_header_space(len(encrypted_session_key), chunk=chunk)
+    envelope = bytearray(header_space)
+    tag = encrypt_with_aes_gcm_stream(compress_stream(data), envelope, session_key, iv,
+                                      associated_data)
+    ciphertext_size = len(envelope) - header_space
+    create_envelope_into(envelope, header_space, encrypted_session_key, iv, tag, chunk=chunk)
+    return bytes(envelope), ciphertext_size
+
+
+def _encrypt_session_key(session_key: bytes, public_key_path: str, public_key=None) -> bytes:
+    """
+    RSA-OAEP encrypt the session key, loading the public key if not given.
     
-    # Step 4: Load public key and encrypt session key
-    print("\nStep 3: Encrypting session key with RSA-3072-OAEP...")
+    Raises:
+        ValueError: If RSA encryption fails
+        FileNotFoundError: If public key file doesn't exist
+    """
     try:
-        public_key = load_public_key(public_key_path)
-        print(f"  Loaded public key from: {public_key_path}")
-        encrypted_session_key = encrypt_with_rsa_oaep(session_key, public_key)
-        print(f"  Encrypted session key size: {len(encrypted_session_key)} bytes")
+        if public_key is None:
+            public_key = load_public_key(public_key_path)
+        return encrypt_with_rsa_oaep(session_key, public_key)
     except FileNotFoundError:
         raise FileNotFoundError(f"Public key file not found: {public_key_path}")
     except Exception as e:
         raise ValueError(f"RSA encryption failed: {str(e)}")
+
+
+def encrypt_data(data: bytes, public_key_path: str, public_key=None,
+                 mode: str = MODE_ALPHANUMERIC):
+    """
+    Encrypt data using the hybrid RSA+AES system.
     
-    # Step 5: Create CBOR envelope
-    print("\nStep 4: Creating CBOR envelope...")
-    try:
-        cbor_envelope = create_envelope(
-            encrypted_key=encrypted_session_key,
-            iv=iv,
-            tag=tag,
-            ciphertext=ciphertext
-        )
-        print(f"  CBOR envelope size: {len(cbor_envelope)} bytes")
-    except Exception as e:
-        raise ValueError(f"CBOR envelope creation failed: {str(e)}")
+    Complete encryption flow:
+    1. Generate random AES-256 session key
+    2. Encrypt session key with RSA-3072-OAEP
+    3. Compress data with zstd, encrypt with AES-256-GCM and package in a
+       CBOR envelope (streamed, see compress_and_encrypt)
+    4. Encode with Base45 (alphanumeric mode only)
+    
+    In byte mode the CBOR envelope itself is returned, for a QR byte-mode
+    segment (qr_generator.generate_qr_code picks that mode for bytes).
+    That stores 8 bits per byte instead of Base45's 8.25 and skips
+    Base45 entirely; decrypt_data accepts either form.
     
-    # Step 6: Encode with Base45
-    print("\nStep 5: Encoding with Base45...")
+    Progress and a summary line of EncryptionStats are reported through
+    this module's logger at DEBUG level (shown by the command-line
+    interface, silent by default).
+    
+    Args:
+        data: Data to encrypt (bytes or any buffer, e.g. from read_file_data)
+        public_key_path: Path to recipient's public key PEM file
+        public_key: Already-loaded public key for public_key_path (optional)
+        mode: "alphanumeric" (default) or "byte"
+    
+    Returns:
+        Base45-encoded string, or the CBOR envelope (bytes) in byte mode
+        (ready for QR code)
+    
+    Raises:
+        ValueError: If encryption fails or mode is unknown
+        FileNotFoundError: If public key file doesn't exist
+    """
+    if mode not in (MODE_ALPHANUMERIC, MODE_BYTE):
+        raise ValueError(f"Unsupported output mode: {mode}")
+    
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Starting encryption process...")
+    
+    # Step 1: Generate session key and IV
+    if debug:
+        logger.debug("Step 1: Generating AES-256 session key and IV...")
+    session_key = generate_session_key()
+    iv = generate_iv()
+    
+    # Step 2: Load public key and encrypt session key
+    if debug:
+        logger.debug("Step 2: Encrypting session key with RSA-3072-OAEP (public key: %s)...",
+                     public_key_path)
+    encrypted_session_key = _encrypt_session_key(session_key, public_key_path, public_key)
+    
+    # Step 3: Compress, encrypt with AES-256-GCM and build the CBOR envelope
+    if debug:
+        logger.debug("Step 3: Compressing (zstd), encrypting (AES-256-GCM, %s) and packaging (CBOR)...",
+                     _AEAD_ENGINE)
     try:
-        base45_string = encode_base45(cbor_envelope)
-        print(f"  Base45 string length: {len(base45_string)} characters")
+        cbor_envelope, ciphertext_size = compress_and_encrypt(
+            data, encrypted_session_key, session_key, iv)
     except Exception as e:
-        raise ValueError(f"Base45 encoding failed: {str(e)}")
+        raise ValueError(f"Compression/encryption failed: {str(e)}")
+    
+    if mode == MODE_BYTE:
+        base45_string = None
+    else:
+        # Step 4: Encode with Base45
+        if debug:
+            logger.debug("Step 4: Encoding with Base45...")
+        try:
+            base45_string = encode_base45(cbor_envelope)
+        except Exception as e:
+            raise ValueError(f"Base45 encoding failed: {str(e)}")
+    
+    if debug:
+        stats = EncryptionStats(len(data), len(encrypted_session_key), ciphertext_size,
+                                len(cbor_envelope),
+                                None if base45_string is None else len(base45_string))
+        logger.debug("\n✅ Encryption completed successfully! %s", stats)
+    
+    return cbor_envelope if base45_string is None else base45_string
+
+
+def _encrypt_chunk(chunk, index: int, encrypted_session_key: bytes, session_key: bytes,
+                   message_id: bytes, total: int, aes_context) -> str:
+    """Encrypt chunk number index of encrypt_data_chunked's message under a fresh IV."""
+    cbor_envelope, _ = compress_and_encrypt(chunk, encrypted_session_key, session_key,
+                                            generate_iv(), (message_id, index, total),
+                                            aes_context)
+    return encode_base45(cbor_envelope)
+
+
+def encrypt_data_chunked(data: bytes, public_key_path: str, chunk_size: int = 2000,
+                         public_key=None) -> list:
+    """
+    Encrypt data as a list of independent envelopes, one per chunk, in parallel.
+    
+    data is split into chunk_size-byte pieces and every piece becomes a
+    complete envelope (e.g. one QR code each), so each Base45 string can be
+    decrypted on its own with decrypt_data; joining the results in order
+    restores data (see decrypt.decrypt_batch). All chunks share one session
+    key, RSA-encrypted once, and each is encrypted under its own random IV.
+    Every envelope also carries a random message id, its index and the
+    chunk count, authenticated as AES-GCM associated data, so
+    decrypt_batch can reject reordered, missing, duplicated or foreign
+    chunks. The chunks are processed by a thread pool: the per-chunk work is
+    native code (zstd releases the GIL while compressing).
+    
+    Args:
+        data: Data to encrypt (bytes or any buffer, e.g. from read_file_data)
+        public_key_path: Path to recipient's public key PEM file
+        chunk_size: Plaintext bytes per envelope (default: 2000)
+        public_key: Already-loaded public key for public_key_path (optional)
+    
+    Returns:
+        List of Base45-encoded strings, in data order
     
-    print("\n✅ Encryption completed successfully!")
-    return base45_string
+    Raises:
+        ValueError: If encryption fails
+        FileNotFoundError: If public key file doesn't exist
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    
+    session_key = generate_session_key()
+    encrypted_session_key = _encrypt_session_key(session_key, public_key_path, public_key)
+    
+    # Zero-copy slices; empty data still produces one (empty) envelope
+    view = memoryview(data)
+    chunks = [view[i:i + chunk_size] for i in range(0, len(view), chunk_size)] or [view]
+    
+    message_id = os.urandom(CHUNK_MESSAGE_ID_SIZE)
+    # One AES-GCM key setup for all chunks, released with this call
+    aes_context = new_aes_gcm_context(session_key)
+    
+    workers = min(os.cpu_count() or 1, len(chunks))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_encrypt_chunk, chunks, range(len(chunks)),
+                                 repeat(encrypted_session_key), repeat(session_key),
+                                 repeat(message_id), repeat(len(chunks)),
+                                 repeat(aes_context)))
 
 
 def encrypt_file(file_path: str, public_key_path: str) -> str:
@@ -139,7 +322,7 @@ def encrypt_file(file_path: str, public_key_path: str) -> str:
     Returns:
         Base45-encoded string (ready for QR code)
     """
-    print(f"Reading file: {file_path}")
+    logger.debug("Reading file: %s", file_path)
     data = read_file_data(file_path)
     return encrypt_data(data, public_key_path)
 
@@ -170,6 +353,9 @@ if __name__ == "__main__":
         print("  python encrypt.py --text \"Hello, World!\" recipient_public.pem")
         sys.exit(1)
     
+    # Show encrypt_data's step-by-step progress
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s", stream=sys.stdout)
+    
     try:
         if sys.argv[1] == "--text":
             # Encrypt text
@@ -2,60 +2,46 @@
 RSA+AES Encryption GUI Application
 
 A desktop GUI for encrypting and decrypting data using hybrid RSA-3072 and AES-256-GCM encryption.
-Uses PyCryptodome (pure Python) - no DLL issues!
+Uses the cryptography library (OpenSSL), or PyCryptodome (pure Python) as a
+fallback - no DLL issues!
 """
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
 import sys
+import threading
 
-# Import encryption modules
-sys.path.insert(0, os.path.dirname(__file__))
-
+# Import encryption modules (sibling modules; the script's directory is
+# already first on sys.path when run as `python gui_app.py`)
 try:
-    from rsa_module import generate_key_pair, save_key_pair, load_public_key, load_private_key, encrypt_with_rsa_oaep, decrypt_with_rsa_oaep
-    from aes_module import encrypt_with_aes_gcm, decrypt_with_aes_gcm
+    from rsa_module import generate_key_pair, save_key_pair, load_public_key, load_private_key, decrypt_with_rsa_oaep
+    from aes_module import decrypt_with_aes_gcm, _AEAD_ENGINE
 except ImportError:
-    messagebox.showerror("Error", "PyCryptodome not installed!\n\nRun: pip install pycryptodome")
+    messagebox.showerror("Error", "Neither cryptography nor PyCryptodome is installed!\n\n"
+                                  "Run: pip install cryptography\n(or: pip install pycryptodome)")
     sys.exit(1)
 
-from compression_module import compress_data, decompress_data
-from cbor_module import create_envelope, parse_envelope
-from base45_module import encode_base45, decode_base45
+from compression_module import decompress_data
+from cbor_module import parse_envelope, chunk_associated_data
+from base45_module import decode_base45, enable_numba
+from encrypt import encrypt_data, read_file_data
 from qr_generator import generate_qr_code
 from qr_reader import read_qr_code
 from PIL import Image, ImageTk
 
 
-def encrypt_data_internal(data: bytes, public_key_path: str) -> str:
-    """Internal encryption function"""
-    # Step 1: Compress
-    compressed_data = compress_data(data)
-    
-    # Step 2: Encrypt with AES-256-GCM
-    ciphertext, tag, session_key, iv = encrypt_with_aes_gcm(compressed_data)
-    
-    # Step 3: Encrypt session key with RSA-OAEP
-    public_key = load_public_key(public_key_path)
-    encrypted_session_key = encrypt_with_rsa_oaep(session_key, public_key)
-    
-    # Step 4: Create CBOR envelope
-    cbor_envelope = create_envelope(
-        encrypted_key=encrypted_session_key,
-        iv=iv,
-        tag=tag,
-        ciphertext=ciphertext
-    )
-    
-    # Step 5: Encode with Base45
-    base45_string = encode_base45(cbor_envelope)
-    
-    return base45_string
+# Number of QR codes (with display photos) kept by EncryptionApp._get_qr_display
+QR_CACHE_SIZE = 4
+
+
+def encrypt_data_internal(data: bytes, public_key_path: str, public_key=None) -> str:
+    """Internal encryption function (public_key: already-loaded key for public_key_path)"""
+    return encrypt_data(data, public_key_path, public_key)
 
 
 def decrypt_data_internal(base45_string: str, private_key_path: str) -> bytes:
-    """Internal decryption function"""
+    """Internal decryption function (byte-mode QR codes: use decrypt.decrypt_data)"""
     # Step 1: Decode Base45
     cbor_data = decode_base45(base45_string)
     
@@ -66,12 +52,14 @@ def decrypt_data_internal(base45_string: str, private_key_path: str) -> bytes:
     private_key = load_private_key(private_key_path)
     session_key = decrypt_with_rsa_oaep(envelope['encrypted_key'], private_key)
     
-    # Step 4: Decrypt with AES-GCM
+    # Step 4: Decrypt with AES-GCM (a chunk's metadata is authenticated with it)
+    chunk = envelope.get('chunk')
     compressed_data = decrypt_with_aes_gcm(
         envelope['ciphertext'],
         envelope['tag'],
         session_key,
-        envelope['iv']
+        envelope['iv'],
+        None if chunk is None else chunk_associated_data(chunk)
     )
     
     # Step 5: Decompress
@@ -83,9 +71,12 @@ def decrypt_data_internal(base45_string: str, private_key_path: str) -> bytes:
 class EncryptionApp:
     def __init__(self, root):
         self.root = root
-        self.root.title("RSA+AES Encryption Tool")
+        self.root.title(f"RSA+AES Encryption Tool (AES-GCM: {_AEAD_ENGINE})")
         self.root.geometry("900x800")
         
+        # text -> {"image": QR image, "photo": ((max_width, max_height), Tk photo)}
+        self._qr_cache = {}
+        
         # Create notebook for tabs
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -124,7 +115,10 @@ class EncryptionApp:
         key_frame = ttk.Frame(frame)
         key_frame.pack(fill=tk.X, padx=20, pady=5)
         ttk.Label(key_frame, text="Public Key:").pack(side=tk.LEFT)
-        self.public_key_entry = ttk.Entry(key_frame, width=40)
+        self.public_key_path = tk.StringVar()
+        self.public_key_path.trace_add("write", lambda *args: self._prefetch_key(
+            self.public_key_path.get().strip(), load_public_key))
+        self.public_key_entry = ttk.Entry(key_frame, width=40, textvariable=self.public_key_path)
         self.public_key_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         ttk.Button(key_frame, text="Browse", command=self.browse_public_key).pack(side=tk.LEFT)
         
@@ -151,8 +145,10 @@ class EncryptionApp:
         self.file_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         ttk.Button(file_input_frame, text="Browse", command=self.browse_file).pack(side=tk.LEFT)
         
-        # Encrypt button
-        ttk.Button(frame, text="Encrypt", command=self.encrypt_data).pack(pady=10)
+        # Encrypt button (progress bar is shown below it while encrypting)
+        self.encrypt_button = ttk.Button(frame, text="Encrypt", command=self.encrypt_data)
+        self.encrypt_button.pack(pady=10)
+        self.encrypt_progress = ttk.Progressbar(frame, mode="indeterminate", length=200)
         
         # Result
         ttk.Label(frame, text="Encrypted Result (Base45):").pack(pady=5)
@@ -174,7 +170,10 @@ class EncryptionApp:
         key_frame = ttk.Frame(frame)
         key_frame.pack(fill=tk.X, padx=20, pady=5)
         ttk.Label(key_frame, text="Private Key:").pack(side=tk.LEFT)
-        self.private_key_entry = ttk.Entry(key_frame, width=40)
+        self.private_key_path = tk.StringVar()
+        self.private_key_path.trace_add("write", lambda *args: self._prefetch_key(
+            self.private_key_path.get().strip(), load_private_key))
+        self.private_key_entry = ttk.Entry(key_frame, width=40, textvariable=self.private_key_path)
         self.private_key_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         ttk.Button(key_frame, text="Browse", command=self.browse_private_key).pack(side=tk.LEFT)
         
@@ -187,8 +186,10 @@ class EncryptionApp:
         self.decrypt_input = scrolledtext.ScrolledText(frame, height=6, width=60)
         self.decrypt_input.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
         
-        # Decrypt button
-        ttk.Button(frame, text="Decrypt", command=self.decrypt_data).pack(pady=10)
+        # Decrypt button (progress bar is shown below it while decrypting)
+        self.decrypt_button = ttk.Button(frame, text="Decrypt", command=self.decrypt_data)
+        self.decrypt_button.pack(pady=10)
+        self.decrypt_progress = ttk.Progressbar(frame, mode="indeterminate", length=200)
         
         # Result
         result_label_frame = ttk.Frame(frame)
@@ -314,6 +315,57 @@ class EncryptionApp:
             self.text_frame.pack_forget()
             self.file_frame.pack(fill=tk.X, padx=20, pady=5)
     
+    def _prefetch_key(self, path, loader):
+        """
+        Parse the key at path in a background thread as soon as its entry changes.
+        
+        loader (load_public_key or load_private_key) caches the parsed key,
+        so the Encrypt/Decrypt click finds it ready instead of parsing PEM
+        on the critical path. Paths that aren't files yet (partially typed)
+        are ignored, and load errors are left for the click to report.
+        """
+        if not os.path.isfile(path):
+            return
+        
+        def worker():
+            try:
+                loader(path)
+            except Exception:
+                pass
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _run_in_background(self, work, on_success, error_title, button, progress):
+        """
+        Run work() in a worker thread so the Tk event loop stays responsive.
+        
+        button is disabled and progress animated while work runs. The result
+        (or exception) is handed back to the Tk thread with root.after, since
+        widgets must only be updated from the main thread.
+        """
+        button.config(state=tk.DISABLED)
+        progress.pack(after=button, pady=5)
+        progress.start(10)
+        
+        def finish(result, error):
+            progress.stop()
+            progress.pack_forget()
+            button.config(state=tk.NORMAL)
+            if error is not None:
+                messagebox.showerror("Error", f"{error_title}: {str(error)}")
+            else:
+                on_success(result)
+        
+        def worker():
+            try:
+                result = work()
+            except Exception as e:
+                self.root.after(0, finish, None, e)
+            else:
+                self.root.after(0, finish, result, None)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
     def encrypt_data(self):
         """Encrypt data based on selected mode"""
         public_key_path = self.public_key_entry.get().strip()
@@ -334,21 +386,28 @@ class EncryptionApp:
                 if not file_path or not os.path.exists(file_path):
                     messagebox.showerror("Error", "Please select a valid file")
                     return
-                with open(file_path, 'rb') as f:
-                    plaintext = f.read()
-            
-            base45_string = encrypt_data_internal(plaintext, public_key_path)
-            
-            self.encrypt_result.delete("1.0", tk.END)
-            self.encrypt_result.insert("1.0", base45_string)
-            
-            # Also populate QR tab
-            self.qr_input.delete("1.0", tk.END)
-            self.qr_input.insert("1.0", base45_string)
-            
-            messagebox.showinfo("Success", "Encryption completed successfully!")
+                plaintext = read_file_data(file_path)
         except Exception as e:
             messagebox.showerror("Error", f"Encryption failed: {str(e)}")
+            return
+        
+        def work():
+            # encrypt_data parses the key through load_public_key's cache
+            return encrypt_data_internal(plaintext, public_key_path)
+        
+        self._run_in_background(work, self._on_encrypt_done, "Encryption failed",
+                                self.encrypt_button, self.encrypt_progress)
+    
+    def _on_encrypt_done(self, base45_string):
+        """Show the encryption result (runs on the Tk thread)"""
+        self.encrypt_result.delete("1.0", tk.END)
+        self.encrypt_result.insert("1.0", base45_string)
+        
+        # Also populate QR tab
+        self.qr_input.delete("1.0", tk.END)
+        self.qr_input.insert("1.0", base45_string)
+        
+        messagebox.showinfo("Success", "Encryption completed successfully!")
     
     def decrypt_data(self):
         """Decrypt Base45 string"""
@@ -362,26 +421,27 @@ class EncryptionApp:
             messagebox.showerror("Error", "Please enter Base45 encrypted string")
             return
         
+        self._run_in_background(lambda: decrypt_data_internal(base45_string, private_key_path),
+                                self._on_decrypt_done, "Decryption failed",
+                                self.decrypt_button, self.decrypt_progress)
+    
+    def _on_decrypt_done(self, data):
+        """Show the decryption result (runs on the Tk thread)"""
+        # Try to decode as text
         try:
-            data = decrypt_data_internal(base45_string, private_key_path)
-            
-            # Try to decode as text
-            try:
-                text = data.decode('utf-8')
-                self.decrypt_result.delete("1.0", tk.END)
-                self.decrypt_result.insert("1.0", text)
-                self.decrypted_data = data
-                self.is_binary = False
-            except UnicodeDecodeError:
-                # Binary data
-                self.decrypt_result.delete("1.0", tk.END)
-                self.decrypt_result.insert("1.0", f"[Binary data - {len(data)} bytes]\n\nUse 'Save Decrypted Data to File' to save this file.")
-                self.decrypted_data = data
-                self.is_binary = True
-            
-            messagebox.showinfo("Success", "Decryption completed successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Decryption failed: {str(e)}")
+            text = data.decode('utf-8')
+            self.decrypt_result.delete("1.0", tk.END)
+            self.decrypt_result.insert("1.0", text)
+            self.decrypted_data = data
+            self.is_binary = False
+        except UnicodeDecodeError:
+            # Binary data
+            self.decrypt_result.delete("1.0", tk.END)
+            self.decrypt_result.insert("1.0", f"[Binary data - {len(data)} bytes]\n\nUse 'Save Decrypted Data to File' to save this file.")
+            self.decrypted_data = data
+            self.is_binary = True
+        
+        messagebox.showinfo("Success", "Decryption completed successfully!")
     
     def save_decrypted(self):
         """Save decrypted data to file"""
@@ -401,6 +461,46 @@ class EncryptionApp:
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save file: {str(e)}")
     
+    def _get_qr_display(self, text, max_width, max_height):
+        """
+        Return (QR image, Tk photo scaled down to fit max_width x max_height) for text.
+        
+        The last QR_CACHE_SIZE QR codes are cached together with their display
+        photo, so regenerating an unchanged QR code (or showing it again at the
+        same size) skips both QR encoding and the PIL to Tk conversion.
+        """
+        entry = self._qr_cache.pop(text, None)
+        if entry is None:
+            entry = {"image": generate_qr_code(text), "photo": None}
+        # Re-insert as most recently used; evict the oldest beyond the limit
+        self._qr_cache[text] = entry
+        while len(self._qr_cache) > QR_CACHE_SIZE:
+            del self._qr_cache[next(iter(self._qr_cache))]
+        
+        img = entry["image"]
+        if entry["photo"] is not None and entry["photo"][0] == (max_width, max_height):
+            return img, entry["photo"][1]
+        
+        # Get original image dimensions
+        orig_width, orig_height = img.size
+        
+        # Calculate scaling factor to fit within bounds while maintaining aspect ratio
+        width_ratio = max_width / orig_width if orig_width > 0 and max_width > 0 else 1
+        height_ratio = max_height / orig_height if orig_height > 0 and max_height > 0 else 1
+        scale_factor = min(width_ratio, height_ratio, 1.0)  # Don't scale up, only down
+        
+        # Resize image if needed (NEAREST keeps the QR modules' square edges sharp)
+        if scale_factor < 1.0:
+            new_width = max(1, int(orig_width * scale_factor))
+            new_height = max(1, int(orig_height * scale_factor))
+            img_display = img.resize((new_width, new_height), Image.Resampling.NEAREST)
+        else:
+            img_display = img
+        
+        photo = ImageTk.PhotoImage(img_display)
+        entry["photo"] = ((max_width, max_height), photo)
+        return img, photo
+    
     def generate_qr(self):
         """Generate QR code from Base45 string"""
         base45_string = self.qr_input.get("1.0", tk.END).strip()
@@ -409,11 +509,6 @@ class EncryptionApp:
             return
         
         try:
-            # Generate QR code
-            img = generate_qr_code(base45_string)
-            self.qr_path = "temp_qr.png"
-            img.save(self.qr_path)
-            
             # Calculate maximum display size (leave some padding)
             # Use window size as reference, with reasonable defaults
             self.root.update_idletasks()  # Ensure window is updated
@@ -424,24 +519,10 @@ class EncryptionApp:
             max_width = min(window_width - 150, 600) if window_width > 0 else 600
             max_height = min(window_height - 300, 500) if window_height > 0 else 500
             
-            # Get original image dimensions
-            orig_width, orig_height = img.size
-            
-            # Calculate scaling factor to fit within bounds while maintaining aspect ratio
-            width_ratio = max_width / orig_width if orig_width > 0 and max_width > 0 else 1
-            height_ratio = max_height / orig_height if orig_height > 0 and max_height > 0 else 1
-            scale_factor = min(width_ratio, height_ratio, 1.0)  # Don't scale up, only down
-            
-            # Resize image if needed
-            if scale_factor < 1.0:
-                new_width = max(1, int(orig_width * scale_factor))
-                new_height = max(1, int(orig_height * scale_factor))
-                img_display = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            else:
-                img_display = img
+            # Generate QR code (or reuse the cached one for unchanged input)
+            img, photo = self._get_qr_display(base45_string, max_width, max_height)
             
             # Display in GUI
-            photo = ImageTk.PhotoImage(img_display)
             self.qr_label.config(image=photo, text="")
             self.qr_label.image = photo  # Keep a reference
             self.qr_image = img  # Keep original for saving
@@ -483,11 +564,6 @@ class EncryptionApp:
             # Get the decrypted text
             text = self.decrypted_data.decode('utf-8')
             
-            # Generate QR code from the decrypted text
-            img = generate_qr_code(text)
-            self.decrypt_qr_path = "temp_decrypted_qr.png"
-            img.save(self.decrypt_qr_path)
-            
             # Calculate display size
             self.root.update_idletasks()
             window_width = self.root.winfo_width()
@@ -496,24 +572,10 @@ class EncryptionApp:
             max_width = min(window_width - 150, 400) if window_width > 0 else 400
             max_height = min(window_height - 400, 400) if window_height > 0 else 400
             
-            # Get original dimensions
-            orig_width, orig_height = img.size
-            
-            # Calculate scaling
-            width_ratio = max_width / orig_width if orig_width > 0 and max_width > 0 else 1
-            height_ratio = max_height / orig_height if orig_height > 0 and max_height > 0 else 1
-            scale_factor = min(width_ratio, height_ratio, 1.0)
-            
-            # Resize if needed
-            if scale_factor < 1.0:
-                new_width = max(1, int(orig_width * scale_factor))
-                new_height = max(1, int(orig_height * scale_factor))
-                img_display = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            else:
-                img_display = img
+            # Generate QR code from the decrypted text (cached for unchanged text)
+            img, photo = self._get_qr_display(text, max_width, max_height)
             
             # Display in GUI
-            photo = ImageTk.PhotoImage(img_display)
             self.decrypt_qr_label.config(image=photo, text="")
             self.decrypt_qr_label.image = photo
             self.decrypt_qr_image = img
@@ -544,6 +606,9 @@ class EncryptionApp:
 def main():
     root = tk.Tk()
     app = EncryptionApp(root)
+    # Long-running process: worth paying Numba's start-up cost once, but in
+    # the background once the window is up, not before it appears
+    root.after_idle(lambda: threading.Thread(target=enable_numba, daemon=True).start())
     root.mainloop()
 
 
@@ -2,9 +2,14 @@
 QR Code Generator Module
 
 This module handles:
-- Generating QR codes from Base45 strings
+- Generating QR codes from Base45 strings (alphanumeric mode) or raw
+  envelope bytes (byte mode)
 - Handling large data by splitting into multiple QR codes
 - Saving QR codes as images
+- Reporting progress through this module's logger (INFO level)
+- Faster encoding, data placement and mask selection for the qrcode library
+  (_FastQRCode)
+- Encoding with the native libqrencode library (opt-in, USE_LIBQRENCODE)
 
 QR Code Limitations:
 - Version 40 (largest): ~2,953 bytes (alphanumeric mode)
@@ -14,10 +19,83 @@ QR Code Limitations:
 
 import qrcode
 from qrcode.constants import ERROR_CORRECT_L
+from qrcode.util import QRData, MODE_8BIT_BYTE
 from PIL import Image
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from operator import itemgetter
+import ctypes
+import ctypes.util
+import logging
+import mmap
 import os
+import re
 
 
+logger = logging.getLogger(__name__)
+
+
+class _QRcode(ctypes.Structure):
+    """libqrencode's QRcode result: width x width module bytes, bit 0 set for dark."""
+    _fields_ = [
+        ("version", ctypes.c_int),
+        ("width", ctypes.c_int),
+        ("data", ctypes.POINTER(ctypes.c_ubyte)),
+    ]
+
+
+# libqrencode (optional): native encoder, used instead of the qrcode library
+# only when installed and enabled with USE_LIBQRENCODE
+try:
+    _libqrencode = ctypes.CDLL(ctypes.util.find_library("qrencode") or "libqrencode.so.4",
+                               use_errno=True)
+    _libqrencode.QRcode_encodeString.argtypes = [
+        ctypes.c_char_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    _libqrencode.QRcode_encodeString.restype = ctypes.POINTER(_QRcode)
+    _libqrencode.QRcode_encodeData.argtypes = [
+        ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_int]
+    _libqrencode.QRcode_encodeData.restype = ctypes.POINTER(_QRcode)
+    _libqrencode.QRcode_free.argtypes = [ctypes.POINTER(_QRcode)]
+    _libqrencode.QRcode_free.restype = None
+    HAS_LIBQRENCODE = True
+except (OSError, AttributeError):
+    HAS_LIBQRENCODE = False
+    # Optional system library, absent by default: not worth a warning
+    logger.debug("libqrencode not available. Using the qrcode library.")
+
+# _FastQRCode overrides qrcode internals (checked against qrcode 8.2, see
+# requirements.txt); fall back to the stock qrcode.QRCode if a release moves them
+try:
+    from qrcode import LUT as qr_lut, base as qr_base, exceptions as qr_exceptions, util as qr_util
+    HAS_QRCODE_INTERNALS = all((
+        hasattr(qr_lut, "rsPoly_LUT"),
+        all(hasattr(qr_base, name) for name in ("Polynomial", "gexp", "EXP_TABLE", "LOG_TABLE", "rs_blocks")),
+        hasattr(qr_exceptions, "DataOverflowError"),
+        all(hasattr(qr_util, name) for name in (
+            "BIT_LIMIT_TABLE", "mode_sizes_for_version", "check_version", "length_in_bits",
+            "mask_func", "PAD0", "PAD1")),
+        all(hasattr(qrcode.QRCode, name) for name in (
+            "best_fit", "makeImpl", "map_data", "best_mask_pattern")),
+    ))
+except ImportError:
+    HAS_QRCODE_INTERNALS = False
+if not HAS_QRCODE_INTERNALS:
+    logger.warning("qrcode internals not as expected. Using the stock qrcode encoder.")
+
+# libqrencode enum values (qrencode.h)
+_QR_ECLEVEL_L = 0
+_QR_MODE_8 = 2
+
+# bytes.translate table from module bytes (bit 0 set for dark: libqrencode's
+# output and _FastQRCode's 0/1 grid) to L-mode pixels
+_MODULES_TO_PIXELS = bytes(0 if i & 1 else 255 for i in range(256))
+
+
+# QR segment modes accepted by generate_qr_code
+QR_MODE_ALPHANUMERIC = "alphanumeric"
+QR_MODE_BYTE = "byte"
+
 # QR code capacity (alphanumeric mode, error correction level L)
 # These are approximate values
 QR_CAPACITIES = {
@@ -28,6 +106,358 @@ QR_CAPACITIES = {
     40: 2953  # Version 40 (maximum)
 }
 
+# Use a fixed mask pattern instead of scoring all 8 (see generate_qr_code)
+FAST_MODE = True
+FAST_MODE_MASK_PATTERN = 0
+
+# Encode with libqrencode when it is installed. Off by default: that path
+# has not yet been verified in an encode/read round trip, so _FastQRCode
+# stays the default encoder
+USE_LIBQRENCODE = False
+
+# QR_CAPACITIES as parallel sorted lists, for bisect in estimate_qr_version
+_CAPACITY_VERSIONS = sorted(QR_CAPACITIES)
+_CAPACITY_LIMITS = [QR_CAPACITIES[version] for version in _CAPACITY_VERSIONS]
+
+
+# bytes.translate tables between 0/1 module bytes and "0"/"1" digit strings
+_MODULES_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_DIGITS_TO_MODULES = bytes.maketrans(b"01", b"\x00\x01")
+
+# Penalty rule 1: runs of 5+ same-colour modules; rule 3: finder-like
+# 1:1:3:1:1 patterns with 4 light modules on either side (overlapping)
+_RUN_RE = re.compile(rb"\x00{5,}|\x01{5,}")
+_FINDER_LIKE_RE = re.compile(
+    rb"(?=\x01\x00\x01\x01\x01\x00\x01\x00\x00\x00\x00|\x00\x00\x00\x00\x01\x00\x01\x01\x01\x00\x01)")
+
+# Per-version placement tables and per-(version, mask) XOR grids for _FastQRCode
+_PLACEMENTS = {}
+_MASK_GRIDS = {}
+_TRANSPOSES = {}
+
+# Reed-Solomon generator polynomials (as GF(256) logs, leading 1 dropped) by EC length
+_RS_GENERATOR_LOGS = {}
+
+
+class _BitBuffer:
+    """
+    Drop-in for qrcode.util.BitBuffer holding the bits in a single int.
+    
+    put() is one shift-and-or instead of a Python call per bit; the
+    byte list qrcode's encoder reads is produced once, on demand.
+    """
+    
+    def __init__(self):
+        self.value = 0
+        self.length = 0
+    
+    def put(self, num, length):
+        self.value = (self.value << length) | num
+        self.length += length
+    
+    def put_bit(self, bit):
+        self.put(1 if bit else 0, 1)
+    
+    def __len__(self):
+        return self.length
+    
+    @property
+    def buffer(self) -> list:
+        pad = -self.length % 8
+        return list((self.value << pad).to_bytes((self.length + pad) // 8, "big"))
+
+
+def _rs_generator_logs(ec_count: int) -> list:
+    """Return the degree-ec_count Reed-Solomon generator as GF(256) logs (see util.create_bytes)."""
+    logs = _RS_GENERATOR_LOGS.get(ec_count)
+    if logs is None:
+        if ec_count in qr_lut.rsPoly_LUT:
+            poly = list(qr_lut.rsPoly_LUT[ec_count])
+        else:
+            rs_poly = qr_base.Polynomial([1], 0)
+            for i in range(ec_count):
+                rs_poly = rs_poly * qr_base.Polynomial([1, qr_base.gexp(i)], 0)
+            poly = list(rs_poly)
+        logs = _RS_GENERATOR_LOGS[ec_count] = [qr_base.LOG_TABLE[c] for c in poly[1:]]
+    return logs
+
+
+def _rs_remainder(data: list, ec_count: int) -> list:
+    """
+    Error correction codewords for one block: data * x^ec_count mod generator.
+    
+    The same remainder qrcode computes with recursive Polynomial objects,
+    as a single shift-register pass over the block.
+    """
+    exp, log = qr_base.EXP_TABLE, qr_base.LOG_TABLE
+    generator = _rs_generator_logs(ec_count)
+    remainder = [0] * ec_count
+    for byte in data:
+        factor = byte ^ remainder[0]
+        del remainder[0]
+        remainder.append(0)
+        if factor:
+            factor_log = log[factor]
+            for i, g in enumerate(generator):
+                remainder[i] ^= exp[(factor_log + g) % 255]
+    return remainder
+
+
+def _create_data(version, error_correction, data_list) -> list:
+    """
+    Codewords for the data segments, as qrcode.util.create_data returns them.
+    
+    Mirrors create_data step for step, using _BitBuffer and _rs_remainder.
+    """
+    buffer = _BitBuffer()
+    for data in data_list:
+        buffer.put(data.mode, 4)
+        buffer.put(len(data), qr_util.length_in_bits(data.mode, version))
+        data.write(buffer)
+    
+    # Maximum number of bits for the given version
+    rs_blocks = qr_base.rs_blocks(version, error_correction)
+    bit_limit = sum(block.data_count * 8 for block in rs_blocks)
+    if len(buffer) > bit_limit:
+        raise qr_exceptions.DataOverflowError(
+            f"Code length overflow. Data size ({len(buffer)}) > size available ({bit_limit})")
+    
+    # Terminator (up to four 0s), zero bits to a byte boundary, then alternating pad bytes
+    buffer.put(0, min(bit_limit - len(buffer), 4))
+    buffer.put(0, -len(buffer) % 8)
+    for i in range((bit_limit - len(buffer)) // 8):
+        buffer.put(qr_util.PAD1 if i % 2 else qr_util.PAD0, 8)
+    
+    # Split into blocks, add error correction and interleave
+    codewords = buffer.buffer
+    dcdata, ecdata = [], []
+    offset = 0
+    for rs_block in rs_blocks:
+        dc_count = rs_block.data_count
+        block = codewords[offset:offset + dc_count]
+        offset += dc_count
+        dcdata.append(block)
+        ecdata.append(_rs_remainder(block, rs_block.total_count - dc_count))
+    
+    data = []
+    for blocks in (dcdata, ecdata):
+        for i in range(max(map(len, blocks))):
+            data.extend(block[i] for block in blocks if i < len(block))
+    return data
+
+
+def _placement(modules) -> tuple:
+    """
+    Return (data_count, gather) for a matrix whose data modules are still None.
+    
+    gather lists, for every module in row-major order, the index of its data
+    bit in map_data's zigzag order, or data_count (a trailing zero) for
+    function-pattern modules. The layout depends only on the version.
+    """
+    n = len(modules)
+    order = {}
+    row, inc = n - 1, -1
+    for col in range(n - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while True:
+            for c in (col, col - 1):
+                if modules[row][c] is None:
+                    order[row * n + c] = len(order)
+            row += inc
+            if row < 0 or n <= row:
+                row -= inc
+                inc = -inc
+                break
+    data_count = len(order)
+    return data_count, [order.get(i, data_count) for i in range(n * n)]
+
+
+def _mask_grid(version: int, mask_pattern: int, gather: list, data_count: int) -> int:
+    """Return the mask for version as an int over row-major module bytes (data modules only)."""
+    key = (version, mask_pattern)
+    grid = _MASK_GRIDS.get(key)
+    if grid is None:
+        n = version * 4 + 17
+        mask = qr_util.mask_func(mask_pattern)
+        cells = bytes(gather[i] != data_count and mask(i // n, i % n) for i in range(n * n))
+        grid = _MASK_GRIDS[key] = int.from_bytes(cells, "big")
+    return grid
+
+
+def _lost_point(grid: bytes, n: int) -> int:
+    """
+    Mask penalty score of an n x n matrix of 0/1 module bytes.
+    
+    Same score as qrcode.util.lost_point, but each rule runs over whole rows
+    and columns as bytes (regex scans, big-int bit operations) instead of
+    indexing modules one at a time.
+    """
+    transpose = _TRANSPOSES.get(n)
+    if transpose is None:
+        transpose = _TRANSPOSES[n] = itemgetter(*(r * n + c for c in range(n) for r in range(n)))
+    lines = [grid[i:i + n] for i in range(0, n * n, n)]
+    columns = bytes(transpose(grid))
+    lines += [columns[i:i + n] for i in range(0, n * n, n)]
+    
+    # Rules 1 and 3 over rows and columns, scanned in one pass; the \x02
+    # separator keeps runs and patterns from spanning two lines
+    joined = b"\x02".join(lines)
+    runs = _RUN_RE.findall(joined)
+    points = sum(map(len, runs)) - 2 * len(runs)
+    points += 40 * len(_FINDER_LIKE_RE.findall(joined))
+    
+    # Rule 2: 2x2 blocks of one colour. Bit c of same is set where modules
+    # c and c+1 of both rows all match
+    row_bits = [int(line.translate(_MODULES_TO_DIGITS), 2) for line in lines[:n]]
+    low = (1 << (n - 1)) - 1
+    for upper, lower in zip(row_bits, row_bits[1:]):
+        same = ~(upper ^ (upper >> 1)) & ~(lower ^ (lower >> 1)) & ~(upper ^ lower)
+        points += 3 * bin(same & low).count("1")
+    
+    # Rule 4: dark module proportion
+    percent = grid.count(1) / (n * n)
+    points += int(abs(percent * 100 - 50) / 5) * 10
+    return points
+
+
+class _FastQRCode(qrcode.QRCode):
+    """
+    qrcode.QRCode with faster encoding, data placement and mask selection.
+    
+    Bits are accumulated in an int-backed _BitBuffer and error correction
+    is computed with a shift-register _rs_remainder. map_data places all
+    data bits with one gather and one big-int XOR per mask (placement
+    tables and mask grids are cached per version), and best_mask_pattern
+    scores the candidate masks with _lost_point. The resulting modules are
+    identical to qrcode.QRCode's.
+    """
+    
+    def best_fit(self, start=None):
+        if start is None:
+            start = 1
+        qr_util.check_version(start)
+        
+        # Same search as QRCode.best_fit, measuring the data with _BitBuffer
+        mode_sizes = qr_util.mode_sizes_for_version(start)
+        buffer = _BitBuffer()
+        for data in self.data_list:
+            buffer.put(data.mode, 4)
+            buffer.put(len(data), mode_sizes[data.mode])
+            data.write(buffer)
+        
+        self.version = bisect_left(qr_util.BIT_LIMIT_TABLE[self.error_correction], len(buffer), start)
+        if self.version == 41:
+            raise qr_exceptions.DataOverflowError()
+        
+        if mode_sizes is not qr_util.mode_sizes_for_version(self.version):
+            self.best_fit(start=self.version)
+        return self.version
+    
+    def makeImpl(self, test, mask_pattern):
+        if self.data_cache is None:
+            self.data_cache = _create_data(self.version, self.error_correction, self.data_list)
+        super().makeImpl(test, mask_pattern)
+    
+    def map_data(self, data, mask_pattern):
+        n = self.modules_count
+        placement = _PLACEMENTS.get(self.version)
+        if placement is None:
+            placement = _PLACEMENTS[self.version] = _placement(self.modules)
+        data_count, gather = placement
+        
+        # Data bits in zigzag order as 0/1 bytes, zero-padded to data_count
+        bits = bin(int.from_bytes(bytes(data), "big"))[2:].zfill(len(data) * 8)
+        bits = bits.encode("ascii")[:data_count].ljust(data_count + 1, b"0")
+        bits = bits.translate(_DIGITS_TO_MODULES)
+        
+        # Function patterns as set up so far (data modules are None -> 0)
+        fixed = bytes(map(bool, chain.from_iterable(self.modules)))
+        placed = bytes(itemgetter(*gather)(bits))
+        grid = (int.from_bytes(fixed, "big") ^ int.from_bytes(placed, "big")
+                ^ _mask_grid(self.version, mask_pattern, gather, data_count))
+        self._grid = grid.to_bytes(n * n, "big")
+        
+        flags = list(map(bool, self._grid))
+        self.modules = [flags[i:i + n] for i in range(0, n * n, n)]
+    
+    def best_mask_pattern(self):
+        min_lost_point = 0
+        pattern = 0
+        
+        for i in range(8):
+            self.makeImpl(True, i)
+            lost_point = _lost_point(self._grid, self.modules_count)
+            
+            if i == 0 or min_lost_point > lost_point:
+                min_lost_point = lost_point
+                pattern = i
+        
+        return pattern
+
+
+def _encode_with_libqrencode(data, mode: str, version: int = None) -> tuple:
+    """
+    Encode data with libqrencode at error correction level L.
+    
+    Byte mode stores data as one 8-bit segment; alphanumeric mode lets
+    libqrencode split the string into numeric/alphanumeric/8-bit segments.
+    
+    Args:
+        data: str or bytes to encode
+        mode: "alphanumeric" or "byte"
+        version: Minimum QR code version, or None for the smallest that fits
+    
+    Returns:
+        tuple: (width, width * width module bytes with bit 0 set for dark)
+    
+    Raises:
+        ValueError: If the data doesn't fit in a QR code or encoding fails
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    
+    if mode == QR_MODE_BYTE:
+        data = bytes(data)
+        qrcode_ptr = _libqrencode.QRcode_encodeData(len(data), data, version or 0, _QR_ECLEVEL_L)
+    else:
+        qrcode_ptr = _libqrencode.QRcode_encodeString(data, version or 0, _QR_ECLEVEL_L, _QR_MODE_8, 1)
+    
+    if not qrcode_ptr:
+        raise ValueError(f"libqrencode failed to encode data: {os.strerror(ctypes.get_errno())}")
+    try:
+        width = qrcode_ptr.contents.width
+        return width, ctypes.string_at(qrcode_ptr.contents.data, width * width)
+    finally:
+        _libqrencode.QRcode_free(qrcode_ptr)
+
+
+def _render_modules(width: int, modules: bytes, box_size: int, border: int) -> Image.Image:
+    """
+    Rasterize a QR module matrix to a black-on-white image.
+    
+    The matrix is built at one pixel per module (a bytes.translate plus a
+    paste into the quiet zone), converted to mode "1" while still small and
+    only then scaled up by box_size with NEAREST. This replaces qrcode's
+    make_image, which draws every dark module as its own rectangle, and
+    gives the same pixels, size and mode.
+    
+    Args:
+        width: Modules per side
+        modules: width * width row-major module bytes, bit 0 set for dark
+        box_size: Size of each box in pixels
+        border: Border thickness in boxes
+    
+    Returns:
+        PIL Image (mode "1")
+    """
+    modules_img = Image.frombytes("L", (width, width), modules.translate(_MODULES_TO_PIXELS))
+    side = width + 2 * border
+    img = Image.new("L", (side, side), 255)
+    img.paste(modules_img, (border, border))
+    img = img.convert("1", dither=Image.Dither.NONE)
+    return img.resize((side * box_size, side * box_size), Image.Resampling.NEAREST)
+
 
 def estimate_qr_version(data_length: int) -> int:
     """
@@ -39,39 +469,91 @@ def estimate_qr_version(data_length: int) -> int:
     Returns:
         QR code version (1-40)
     """
-    for version in sorted(QR_CAPACITIES.keys()):
-        if data_length <= QR_CAPACITIES[version]:
-            return version
+    i = bisect_left(_CAPACITY_LIMITS, data_length)
+    if i < len(_CAPACITY_VERSIONS):
+        return _CAPACITY_VERSIONS[i]
     
     # Data is too large for a single QR code
     return 40  # Maximum version
 
 
+def _save_image(img: Image.Image, output_path: str, compress_level: int = 1):
+    """
+    Save a QR code image, in the format given by the file extension.
+    
+    PNG saves are dominated by zlib deflate; on black-and-white QR images a
+    low compress_level is much faster for a small size increase. A ".bmp"
+    path skips compression altogether.
+    """
+    if os.path.splitext(output_path)[1].lower() in ('', '.png'):
+        img.save(output_path, format='PNG', optimize=False, compress_level=compress_level)
+    else:
+        img.save(output_path)
+    logger.info("QR code saved to: %s", output_path)
+
+
 def generate_qr_code(data: str, output_path: str = None, version: int = None, 
-                     box_size: int = 10, border: int = 4) -> Image.Image:
+                     box_size: int = 10, border: int = 4, mode: str = None,
+                     compress_level: int = 1, mask_pattern: int = None) -> Image.Image:
     """
     Generate a single QR code from data string.
     
     Args:
-        data: Data string to encode (Base45 string)
+        data: Data to encode (Base45 string, or CBOR envelope bytes)
         output_path: Optional path to save QR code image
-        version: QR code version (1-40). If None, auto-detect.
+        version: QR code version (1-40); a larger one is used if the data
+            doesn't fit. If None, auto-detect.
         box_size: Size of each box in pixels (default: 10)
         border: Border thickness in boxes (default: 4)
+        mode: "alphanumeric" or "byte". If None, "byte" for bytes data
+            and "alphanumeric" for strings.
+        compress_level: zlib level (0-9) for PNG output (default: 1,
+            fast). Other formats follow the output_path extension.
+        mask_pattern: QR mask pattern (0-7). If None, mask 0 when
+            FAST_MODE is set, otherwise the lowest-penalty mask. Scoring
+            all 8 masks is most of the encoding time; a fixed mask gives
+            a valid code that may be slightly harder to scan (more
+            same-colour blocks or finder-like runs). libqrencode (when
+            enabled with USE_LIBQRENCODE) always picks its own mask.
     
     Returns:
         PIL Image object of the QR code
+    
+    Raises:
+        ValueError: If mode is unknown
     """
+    if mode is None:
+        mode = QR_MODE_BYTE if isinstance(data, (bytes, bytearray)) else QR_MODE_ALPHANUMERIC
+    if mode not in (QR_MODE_ALPHANUMERIC, QR_MODE_BYTE):
+        raise ValueError(f"Unsupported QR mode: {mode}")
+    
+    if USE_LIBQRENCODE and HAS_LIBQRENCODE:
+        img = _render_modules(*_encode_with_libqrencode(data, mode, version), box_size, border)
+        if output_path:
+            _save_image(img, output_path, compress_level)
+        return img
+    
+    if mask_pattern is None and FAST_MODE:
+        mask_pattern = FAST_MODE_MASK_PATTERN
+    
     # Create QR code instance
-    qr = qrcode.QRCode(
+    qr_class = _FastQRCode if HAS_QRCODE_INTERNALS else qrcode.QRCode
+    qr = qr_class(
         version=version,
         error_correction=ERROR_CORRECT_L,  # Low error correction for more capacity
         box_size=box_size,
         border=border,
+        mask_pattern=mask_pattern,  # None: evaluate all 8 masks
     )
     
     # Add data
-    qr.add_data(data)
+    if mode == QR_MODE_BYTE:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        # One byte-mode segment; optimize=0 stops qrcode re-splitting it
+        qr.add_data(QRData(bytes(data), mode=MODE_8BIT_BYTE), optimize=0)
+    else:
+        qr.add_data(data)
     
     # Make QR code
     if version is None:
@@ -79,13 +561,16 @@ def generate_qr_code(data: str, output_path: str = None, version: int = None,
     else:
         qr.make()
     
-    # Create image
-    img = qr.make_image(fill_color="black", back_color="white")
+    # Create image (black on white) from the placed modules
+    if HAS_QRCODE_INTERNALS:
+        grid = qr._grid
+    else:
+        grid = bytes(map(bool, chain.from_iterable(qr.modules)))
+    img = _render_modules(qr.modules_count, grid, box_size, border)
     
     # Save if path provided
     if output_path:
-        img.save(output_path)
-        print(f"QR code saved to: {output_path}")
+        _save_image(img, output_path, compress_level)
     
     return img
 
@@ -95,49 +580,66 @@ def split_data_for_qr(data: str, max_chunk_size: int = 2500) -> list:
     Split data into chunks that fit in QR codes.
     
     Args:
-        data: Data string to split
+        data: Data string (or bytes) to split
         max_chunk_size: Maximum characters per chunk (default: 2500, safe for version 30)
     
     Returns:
         List of data chunks
     """
-    chunks = []
-    for i in range(0, len(data), max_chunk_size):
-        chunk = data[i:i + max_chunk_size]
-        chunks.append(chunk)
-    return chunks
+    return [data[i:i + max_chunk_size] for i in range(0, len(data), max_chunk_size)]
+
+
+def _save_qr_code(chunk, output_path: str) -> str:
+    """Process-pool worker for generate_multiple_qr_codes: encode and save one chunk."""
+    generate_qr_code(chunk, output_path)
+    return output_path
 
 
 def generate_multiple_qr_codes(data: str, output_prefix: str = "qr_code", 
-                               max_chunk_size: int = 2500) -> list:
+                               max_chunk_size: int = 2500, max_workers: int = None,
+                               fast_io: bool = False) -> list:
     """
     Generate multiple QR codes for large data.
     
+    QR encoding is CPU-bound Python, so the chunks are encoded in parallel
+    worker processes (only file paths travel back, not images).
+    
     Args:
         data: Data string to encode
         output_prefix: Prefix for output filenames (e.g., "qr_code" -> "qr_code_1.png", "qr_code_2.png")
         max_chunk_size: Maximum characters per QR code
+        max_workers: Number of worker processes (default: CPU count)
+        fast_io: Write uncompressed .bmp files instead of .png, for
+            intermediate images that don't need to be PNG
     
     Returns:
         List of (chunk_number, image_path) tuples
     """
     chunks = split_data_for_qr(data, max_chunk_size)
+    ext = ".bmp" if fast_io else ".png"
     
     if len(chunks) == 1:
         # Single QR code
-        output_path = f"{output_prefix}.png"
+        output_path = f"{output_prefix}{ext}"
         img = generate_qr_code(data, output_path)
         return [(1, output_path)]
     
     # Multiple QR codes
-    print(f"Splitting data into {len(chunks)} QR codes...")
-    results = []
+    logger.info("Splitting data into %d QR codes...", len(chunks))
+    output_paths = [f"{output_prefix}_{i}{ext}" for i in range(1, len(chunks) + 1)]
     
-    for i, chunk in enumerate(chunks, 1):
-        output_path = f"{output_prefix}_{i}.png"
-        img = generate_qr_code(chunk, output_path)
-        results.append((i, output_path))
-        print(f"  Generated QR code {i}/{len(chunks)}: {output_path} ({len(chunk)} chars)")
+    workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        # Not worth starting a process pool
+        saved = map(_save_qr_code, chunks, output_paths)
+        results = [(i, path) for i, path in enumerate(saved, 1)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(enumerate(executor.map(_save_qr_code, chunks, output_paths), 1))
+    
+    if logger.isEnabledFor(logging.INFO):
+        for (i, output_path), chunk in zip(results, chunks):
+            logger.info("  Generated QR code %d/%d: %s (%d chars)", i, len(chunks), output_path, len(chunk))
     
     return results
 
@@ -155,24 +657,45 @@ def generate_qr_from_base45(base45_string: str, output_path: str = "encrypted_qr
     Returns:
         List of generated QR code file paths
     """
-    print(f"Generating QR code(s) from Base45 string...")
-    print(f"Base45 string length: {len(base45_string)} characters")
+    logger.info("Generating QR code(s) from Base45 string...")
+    logger.info("Base45 string length: %d characters", len(base45_string))
     
     # Estimate if we need multiple QR codes
     estimated_version = estimate_qr_version(len(base45_string))
     
     if estimated_version <= 40:
         # Can fit in single QR code
-        print(f"Estimated QR version needed: {estimated_version}")
+        logger.info("Estimated QR version needed: %d", estimated_version)
         results = generate_multiple_qr_codes(base45_string, output_path.replace('.png', ''), max_chunk_size=2500)
         return [path for _, path in results]
     else:
         # Need multiple QR codes
-        print(f"Data is too large for a single QR code. Splitting...")
+        logger.info("Data is too large for a single QR code. Splitting...")
         results = generate_multiple_qr_codes(base45_string, output_path.replace('.png', ''), max_chunk_size=2500)
         return [path for _, path in results]
 
 
+def _read_base45_file(file_path: str) -> str:
+    """
+    Read a Base45 payload file, without surrounding whitespace.
+    
+    The file is memory-mapped and only the stripped range is decoded, so
+    the text is materialized once instead of as read() plus strip() copies.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            while end and mm[end - 1] in b" \t\r\n\v\f":
+                end -= 1
+            start = 0
+            while start < end and mm[start] in b" \t\r\n\v\f":
+                start += 1
+            with memoryview(mm) as view:
+                return str(view[start:end], 'ascii')
+
+
 # Command-line interface
 if __name__ == "__main__":
     import sys
@@ -186,14 +709,16 @@ if __name__ == "__main__":
         print("  python qr_generator.py --file encrypted.txt encrypted_qr.png")
         sys.exit(1)
     
+    # Show progress from the generator functions
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    
     try:
         if sys.argv[1] == "--file":
             # Read from file
             base45_file = sys.argv[2]
             output_path = sys.argv[3] if len(sys.argv) > 3 else "encrypted_qr.png"
             
-            with open(base45_file, 'r') as f:
-                base45_string = f.read().strip()
+            base45_string = _read_base45_file(base45_file)
         else:
             # From command line
             base45_string = sys.argv[1]
@@ -3,32 +3,165 @@ QR Code Reader Module
 
 This module handles:
 - Reading QR codes from image files
-- Extracting Base45 encoded data
+- Extracting Base45 encoded data (or raw bytes from byte-mode QR codes)
 - Supporting multiple QR code reading methods
+- Reading several QR code images in parallel
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+import logging
+import os
+import re
+import threading
 from PIL import Image
 import cv2
 import numpy as np
+from cbor_module import parse_envelope_fast
+
+
+logger = logging.getLogger(__name__)
 
 # Try to import pyzbar (primary method)
 try:
-    from pyzbar.pyzbar import decode as pyzbar_decode
+    from pyzbar.pyzbar import decode as pyzbar_decode, ZBarSymbol
     PYZBAR_AVAILABLE = True
+    # Only scan for QR codes; zbar otherwise runs every symbology's decoder
+    _QR_ONLY = [ZBarSymbol.QRCODE]
 except ImportError:
     PYZBAR_AVAILABLE = False
     print("Warning: pyzbar not available. Using OpenCV QR decoder only.")
 
+# WeChat QR decoder (opencv-contrib, optional) for the OpenCV backup path;
+# without it cv2.QRCodeDetector is used, so its absence isn't worth a warning
+HAS_WECHAT_QRCODE = hasattr(cv2, "wechat_qrcode_WeChatQRCode")
+if not HAS_WECHAT_QRCODE:
+    logger.debug("cv2.wechat_qrcode not available. Using cv2.QRCodeDetector.")
+
+# Directory holding the WeChat detector / super-resolution models
+WECHAT_MODEL_DIR = os.environ.get(
+    "WECHAT_QRCODE_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "wechat_qrcode"),
+)
+_WECHAT_MODEL_FILES = ("detect.prototxt", "detect.caffemodel", "sr.prototxt", "sr.caffemodel")
+
+
+# "<prefix>_<n><ext>", as written by qr_generator.generate_multiple_qr_codes
+_CHUNK_PATH_RE = re.compile(r"(.*)_(\d+)(\.[^./\\]*)?")
+
+
+# OpenCV QR detectors, one per thread (an instance isn't safe to share
+# between the threads of read_qr_codes)
+_CV_DETECTORS = threading.local()
+
+
+def _get_qr_detector():
+    """Return this thread's cv2.QRCodeDetector, creating it on first use."""
+    detector = getattr(_CV_DETECTORS, "detector", None)
+    if detector is None:
+        detector = _CV_DETECTORS.detector = cv2.QRCodeDetector()
+    return detector
+
+
+def _get_wechat_detector():
+    """
+    Return this thread's WeChat QR detector, creating it on first use.
+    
+    Uses the CNN detector and super-resolution models from WECHAT_MODEL_DIR
+    when they are all present, otherwise the module's built-in detector.
+    """
+    detector = getattr(_CV_DETECTORS, "wechat", None)
+    if detector is None:
+        model_paths = [os.path.join(WECHAT_MODEL_DIR, name) for name in _WECHAT_MODEL_FILES]
+        if all(os.path.isfile(path) for path in model_paths):
+            detector = cv2.wechat_qrcode_WeChatQRCode(*model_paths)
+        else:
+            detector = cv2.wechat_qrcode_WeChatQRCode()
+        _CV_DETECTORS.wechat = detector
+    return detector
+
+
+def _chunk_sort_key(path: str) -> tuple:
+    """Sort key putting chunk images in numeric order (qr_code_2 before qr_code_10)."""
+    match = _CHUNK_PATH_RE.fullmatch(path)
+    if match is None:
+        return (path, 0, "")
+    prefix, index, ext = match.groups()
+    return (prefix, int(index), ext or "")
+
+
+def _is_envelope(data: bytes) -> bool:
+    """Return whether data parses as a CBOR envelope (see cbor_module)."""
+    try:
+        parse_envelope_fast(data)
+        return True
+    except ValueError:
+        return False
+
+
+def _byte_mode_payload(data: bytes) -> bytes:
+    """
+    Recover the raw bytes of a byte-mode QR segment from decoder output.
+    
+    Without an ECI header, ZBar and OpenCV pass payloads that are valid
+    UTF-8 through untouched, but return any other payload transcoded from
+    ISO-8859-1 to UTF-8. Both cases give valid UTF-8, so the output alone
+    can't tell them apart. The candidate that parses as a CBOR envelope
+    (the byte-mode payload encrypt.encrypt_data produces) is returned;
+    if neither does, data is returned unchanged. Raw reads of anything
+    other than an envelope are therefore unreliable: a payload that
+    wasn't valid UTF-8 comes back in its transcoded form.
+    """
+    if _is_envelope(data):
+        return data
+    try:
+        reversed_data = data.decode('utf-8').encode('latin-1')
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        return data
+    return reversed_data if _is_envelope(reversed_data) else data
 
-def read_qr_with_pyzbar(image_path: str) -> str:
+
+def _load_grayscale(image_path: str) -> np.ndarray:
+    """
+    Load an image file as a single 8-bit grayscale array.
+    
+    Both decoders work on grayscale, so decoding straight to one channel
+    lets them share the same buffer instead of each converting its own copy.
+    Formats OpenCV can't read (e.g. GIF) are loaded through PIL instead.
+    
+    Args:
+        image_path: Path to image file
+    
+    Returns:
+        2-D uint8 array (height x width)
+    
+    Raises:
+        ValueError: If the image cannot be read
+    """
+    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if gray is not None:
+        return gray
+    
+    try:
+        with Image.open(image_path) as img:
+            # Decode straight to luminance where the format supports it (JPEG)
+            img.draft("L", img.size)
+            return np.asarray(img if img.mode == "L" else img.convert("L"))
+    except Exception as e:
+        raise ValueError(f"Could not read image: {image_path}: {str(e)}")
+
+
+def read_qr_with_pyzbar(image, raw: bool = False):
     """
     Read QR code using pyzbar library.
     
     Args:
-        image_path: Path to QR code image file
+        image: Path to QR code image file, or a grayscale array from
+            _load_grayscale
+        raw: Return the payload as bytes (for byte-mode QR codes)
     
     Returns:
-        Decoded string from QR code
+        Decoded string from QR code (bytes if raw)
     
     Raises:
         ValueError: If no QR code found or multiple QR codes found
@@ -36,11 +169,11 @@ def read_qr_with_pyzbar(image_path: str) -> str:
     if not PYZBAR_AVAILABLE:
         raise ImportError("pyzbar is not installed")
     
-    # Open image
-    img = Image.open(image_path)
+    gray = _load_grayscale(image) if isinstance(image, str) else image
+    height, width = gray.shape
     
-    # Decode QR codes
-    decoded_objects = pyzbar_decode(img)
+    # Decode QR codes from the raw 8-bit pixels (skips pyzbar's own conversion)
+    decoded_objects = pyzbar_decode((gray.tobytes(), width, height), symbols=_QR_ONLY)
     
     if len(decoded_objects) == 0:
         raise ValueError("No QR code found in image")
@@ -49,42 +182,58 @@ def read_qr_with_pyzbar(image_path: str) -> str:
         raise ValueError(f"Multiple QR codes found ({len(decoded_objects)}). Please use an image with a single QR code.")
     
     # Extract data
+    if raw:
+        return _byte_mode_payload(decoded_objects[0].data)
     qr_data = decoded_objects[0].data.decode('utf-8')
     return qr_data
 
 
-def read_qr_with_opencv(image_path: str) -> str:
+def read_qr_with_opencv(image, raw: bool = False):
     """
     Read QR code using OpenCV library (backup method).
     
+    Uses the WeChat QR decoder when available; its detector and
+    super-resolution handle low-quality images in a single call. Raw
+    reads always use cv2.QRCodeDetector, which can return the payload
+    bytes.
+    
     Args:
-        image_path: Path to QR code image file
+        image: Path to QR code image file, or a grayscale array from
+            _load_grayscale
+        raw: Return the payload as bytes (for byte-mode QR codes)
     
     Returns:
-        Decoded string from QR code
+        Decoded string from QR code (bytes if raw)
     
     Raises:
         ValueError: If no QR code found
     """
-    # Read image
-    img = cv2.imread(image_path)
+    img = _load_grayscale(image) if isinstance(image, str) else image
     
-    if img is None:
-        raise ValueError(f"Could not read image: {image_path}")
+    if HAS_WECHAT_QRCODE and not raw:
+        results, _ = _get_wechat_detector().detectAndDecode(img)
+        if not results:
+            raise ValueError("No QR code found in image")
+        return results[0]
     
-    # Initialize QR code detector
-    qr_detector = cv2.QRCodeDetector()
+    # Reuse the QR code detector across calls
+    qr_detector = _get_qr_detector()
     
     # Detect and decode
-    data, vertices, _ = qr_detector.detectAndDecode(img)
+    if raw and hasattr(qr_detector, "detectAndDecodeBytes"):
+        data, vertices, _ = qr_detector.detectAndDecodeBytes(img)
+    else:
+        data, vertices, _ = qr_detector.detectAndDecode(img)
     
-    if vertices is None or data == "":
+    if vertices is None or len(data) == 0:
         raise ValueError("No QR code found in image")
     
+    if raw:
+        return _byte_mode_payload(data if isinstance(data, bytes) else data.encode('utf-8'))
     return data
 
 
-def read_qr_code(image_path: str) -> str:
+def read_qr_code(image_path: str, raw: bool = False):
     """
     Read QR code from image file using best available method.
     
@@ -92,9 +241,13 @@ def read_qr_code(image_path: str) -> str:
     
     Args:
         image_path: Path to QR code image file
+        raw: Return the payload as bytes, e.g. the CBOR envelope of a
+            byte-mode QR code (see encrypt.encrypt_data). Only reliable
+            for envelopes, see _byte_mode_payload.
     
     Returns:
-        Decoded string from QR code (typically Base45 encoded data)
+        Decoded string from QR code (typically Base45 encoded data), or
+        bytes if raw
     
     Raises:
         ValueError: If no QR code found or image cannot be read
@@ -102,16 +255,19 @@ def read_qr_code(image_path: str) -> str:
     """
     errors = []
     
+    # Load once; both decoders share the grayscale buffer
+    gray = _load_grayscale(image_path)
+    
     # Try pyzbar first (more reliable)
     if PYZBAR_AVAILABLE:
         try:
-            return read_qr_with_pyzbar(image_path)
+            return read_qr_with_pyzbar(gray, raw)
         except Exception as e:
             errors.append(f"pyzbar: {str(e)}")
     
     # Try OpenCV as backup
     try:
-        return read_qr_with_opencv(image_path)
+        return read_qr_with_opencv(gray, raw)
     except Exception as e:
         errors.append(f"opencv: {str(e)}")
     
@@ -120,27 +276,62 @@ def read_qr_code(image_path: str) -> str:
     raise ValueError(error_msg)
 
 
+def read_qr_codes(image_paths, raw: bool = False, max_workers: int = None) -> list:
+    """
+    Read several QR code images (e.g. the chunks of a split payload).
+    
+    Image loading and both decoders run in native code that releases the
+    GIL, so the images are read across a thread pool.
+    
+    Args:
+        image_paths: Iterable of QR code image file paths
+        raw: Return each payload as bytes (see read_qr_code)
+        max_workers: Number of threads (default: up to 8)
+    
+    Returns:
+        List of decoded strings (bytes if raw), in input order
+    
+    Raises:
+        ValueError: If any image has no readable QR code
+    """
+    image_paths = list(image_paths)
+    workers = min(max_workers or 8, len(image_paths))
+    if workers <= 1:
+        # Not worth starting a thread pool
+        return [read_qr_code(path, raw) for path in image_paths]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_qr_code, image_paths, repeat(raw)))
+
+
 # Command-line interface
 if __name__ == "__main__":
     import sys
+    import glob
     
     if len(sys.argv) < 2:
-        print("Usage: python qr_reader.py <qr_image_path>")
+        print("Usage: python qr_reader.py <qr_image_path_or_pattern> [...]")
         print("\nExample:")
         print("  python qr_reader.py encrypted_qr.png")
+        print("  python qr_reader.py \"encrypted_qr_*.png\"")
         sys.exit(1)
     
-    image_path = sys.argv[1]
+    # Expand glob patterns (quoted, or on shells that don't expand them)
+    image_paths = []
+    for arg in sys.argv[1:]:
+        image_paths.extend(sorted(glob.glob(arg), key=_chunk_sort_key) or [arg])
     
     try:
-        print(f"Reading QR code from: {image_path}")
-        data = read_qr_code(image_path)
+        print(f"Reading QR code from: {', '.join(image_paths)}")
+        results = read_qr_codes(image_paths)
         print(f"\n✅ QR Code decoded successfully!")
-        print(f"\nData length: {len(data)} characters")
-        print(f"\nDecoded data:")
-        print("-" * 50)
-        print(data)
-        print("-" * 50)
+        for image_path, data in zip(image_paths, results):
+            if len(image_paths) > 1:
+                print(f"\n{image_path}:")
+            print(f"\nData length: {len(data)} characters")
+            print(f"\nDecoded data:")
+            print("-" * 50)
+            print(data)
+            print("-" * 50)
     except Exception as e:
         print(f"\n❌ Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -6,31 +6,83 @@ This module handles:
 - Key storage and loading (PEM format)
 - RSA-OAEP encryption (using public key)
 - RSA-OAEP decryption (using private key)
+- Batch RSA-OAEP encryption/decryption across a thread pool
 
-Uses PyCryptodome (pure Python) - no DLL issues!
+Uses the `cryptography` RSA primitives, backed by OpenSSL's key generation
+and Montgomery/CRT modular exponentiation. If `cryptography` is not
+installed, falls back to PyCryptodome (pure Python - no DLL issues!). Both
+backends read each other's PEM files and ciphertexts.
 """
 
-from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_OAEP
-from Crypto.Hash import SHA256
+import functools
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    from Crypto.PublicKey import RSA
+    from Crypto.Cipher import PKCS1_OAEP
+    from Crypto.Hash import SHA256
+    HAS_CRYPTOGRAPHY = False
+    print("Warning: cryptography not available. Using PyCryptodome RSA-OAEP.")
+
+# RSA public exponent
+PUBLIC_EXPONENT = 65537
+
+if HAS_CRYPTOGRAPHY:
+    # OAEP with SHA-256 and MGF1-SHA-256, no label (same as PKCS1_OAEP with hashAlgo=SHA256)
+    _OAEP_PADDING = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                                 algorithm=hashes.SHA256(), label=None)
+
+
+def _check_crt_key(private_key):
+    """
+    Make sure a PyCryptodome private key carries its CRT components.
+    
+    PyCryptodome decrypts with CRT (p, q, u) whenever the primes are
+    present, which is ~4x faster than exponentiating with d. Keys from
+    RSA.generate and from PKCS#1/PKCS#8 files always have them; this
+    rejects public keys passed where a private key is expected.
+    (cryptography always holds dmp1/dmq1/iqmp and decrypts with CRT.)
+    
+    Raises:
+        ValueError: If the key is not a private key with CRT components
+    """
+    if not private_key.has_private() or private_key.p is None or private_key.q is None:
+        raise ValueError("RSA key is not a private key with CRT components")
 
 
 def generate_key_pair(key_size=3072):
     """
-    Generate an RSA key pair using PyCryptodome.
+    Generate an RSA key pair.
+    
+    The public exponent is PUBLIC_EXPONENT (65537) and the private key
+    keeps its CRT components, so decryption uses CRT on both backends.
     
     Args:
         key_size: Key size in bits (default: 3072 for RSA-3072)
     
     Returns:
-        tuple: (private_key, public_key) as PyCryptodome key objects
+        tuple: (private_key, public_key) as key objects of the active
+        backend (cryptography or PyCryptodome)
     """
     # Generate private key
-    private_key = RSA.generate(key_size)
+    if HAS_CRYPTOGRAPHY:
+        private_key = rsa.generate_private_key(public_exponent=PUBLIC_EXPONENT, key_size=key_size)
+    else:
+        private_key = RSA.generate(key_size, e=PUBLIC_EXPONENT)
+        _check_crt_key(private_key)
     
     # Derive public key from private key
-    public_key = private_key.publickey()
+    if HAS_CRYPTOGRAPHY:
+        public_key = private_key.public_key()
+    else:
+        public_key = private_key.publickey()
     
     return private_key, public_key
 
@@ -47,11 +99,25 @@ def save_key_pair(private_key, public_key, name_prefix="key"):
     Returns:
         tuple: (private_key_path, public_key_path)
     """
-    # Export private key to PEM format
-    private_pem = private_key.export_key('PEM')
-    
-    # Export public key to PEM format
-    public_pem = public_key.export_key('PEM')
+    if HAS_CRYPTOGRAPHY:
+        # Export private key to PEM format (unencrypted PKCS#8)
+        private_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        
+        # Export public key to PEM format (SubjectPublicKeyInfo)
+        public_pem = public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    else:
+        # Export private key to PEM format
+        private_pem = private_key.export_key('PEM')
+        
+        # Export public key to PEM format
+        public_pem = public_key.export_key('PEM')
     
     # Write to files
     private_path = f"{name_prefix}_private.pem"
@@ -66,34 +132,80 @@ def save_key_pair(private_key, public_key, name_prefix="key"):
     return private_path, public_path
 
 
+def _load_key(file_path, private):
+    """
+    Load an RSA key from a PEM file through the parsed-key cache.
+    
+    Parsed keys are cached per file, so repeated operations with the same
+    key skip PEM/DER parsing. The cache is keyed on the file's modification
+    time, so a replaced key file is picked up automatically.
+    """
+    mtime_ns = os.stat(file_path).st_mtime_ns
+    return _load_key_cached(os.path.abspath(file_path), mtime_ns, private)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_key_cached(file_path, mtime_ns, private):
+    """Parse a key file; mtime_ns is only part of the cache key."""
+    with open(file_path, 'rb') as f:
+        pem = f.read()
+    
+    if not HAS_CRYPTOGRAPHY:
+        key = RSA.import_key(pem)
+        if private:
+            _check_crt_key(key)
+        return key
+    if private:
+        return serialization.load_pem_private_key(pem, password=None)
+    return serialization.load_pem_public_key(pem)
+
+
 def load_private_key(file_path):
     """
     Load private key from PEM file.
     
+    Parsed keys are cached (see _load_key), so repeated decryptions with
+    the same key skip PEM/DER parsing.
+    
     Args:
         file_path: Path to private key PEM file
     
     Returns:
         Private key object
     """
-    with open(file_path, 'rb') as f:
-        private_key = RSA.import_key(f.read())
-    return private_key
+    return _load_key(file_path, True)
 
 
 def load_public_key(file_path):
     """
     Load public key from PEM file.
     
+    Parsed keys are cached (see _load_key), so repeated encryptions to
+    the same recipient skip PEM/DER parsing.
+    
     Args:
         file_path: Path to public key PEM file
     
     Returns:
         Public key object
     """
-    with open(file_path, 'rb') as f:
-        public_key = RSA.import_key(f.read())
-    return public_key
+    return _load_key(file_path, False)
+
+
+def _mgf1_sha256(seed, mask_len):
+    """
+    MGF1 mask generation with SHA-256 (RFC 8017, B.2.1), computed with hashlib.
+    
+    Used by the PyCryptodome backend. Produces exactly the mask
+    PyCryptodome's own MGF1 would, but each block
+    is one call into OpenSSL's SHA-256 (SHA-NI accelerated where available)
+    instead of a PyCryptodome hash object, which cuts the per-block overhead
+    that dominates OAEP padding.
+    """
+    blocks = (mask_len + 31) // 32
+    mask = b"".join(hashlib.sha256(seed + counter.to_bytes(4, "big")).digest()
+                    for counter in range(blocks))
+    return mask[:mask_len]
 
 
 def encrypt_with_rsa_oaep(data, public_key):
@@ -112,13 +224,19 @@ def encrypt_with_rsa_oaep(data, public_key):
     """
     # RSA-3072 can encrypt up to (key_size/8 - 2*hash_size/8 - 2) bytes
     # For RSA-3072 with SHA-256: 384 - 64 - 2 = 318 bytes max
-    max_size = (public_key.size_in_bytes()) - 66
+    if HAS_CRYPTOGRAPHY:
+        max_size = (public_key.key_size + 7) // 8 - 66
+    else:
+        max_size = (public_key.size_in_bytes()) - 66
     
     if len(data) > max_size:
         raise ValueError(f"Data too large for RSA encryption. Max size: {max_size} bytes, got: {len(data)} bytes")
     
+    if HAS_CRYPTOGRAPHY:
+        return public_key.encrypt(data, _OAEP_PADDING)
+    
     # Create OAEP cipher with SHA-256
-    cipher = PKCS1_OAEP.new(public_key, hashAlgo=SHA256)
+    cipher = PKCS1_OAEP.new(public_key, hashAlgo=SHA256, mgfunc=_mgf1_sha256)
     
     # Encrypt
     ciphertext = cipher.encrypt(data)
@@ -141,8 +259,11 @@ def decrypt_with_rsa_oaep(encrypted_data, private_key):
         ValueError: If decryption fails (wrong key, corrupted data, etc.)
     """
     try:
+        if HAS_CRYPTOGRAPHY:
+            return private_key.decrypt(encrypted_data, _OAEP_PADDING)
+        
         # Create OAEP cipher with SHA-256
-        cipher = PKCS1_OAEP.new(private_key, hashAlgo=SHA256)
+        cipher = PKCS1_OAEP.new(private_key, hashAlgo=SHA256, mgfunc=_mgf1_sha256)
         
         # Decrypt
         plaintext = cipher.decrypt(encrypted_data)
@@ -151,6 +272,56 @@ def decrypt_with_rsa_oaep(encrypted_data, private_key):
         raise ValueError(f"RSA decryption failed: {str(e)}")
 
 
+def _map_in_threads(func, items, key, max_workers):
+    """Apply func(item, key) to every item, across threads when there is more than one."""
+    items = list(items)
+    workers = min(max_workers or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        # Not worth starting a thread pool
+        return [func(item, key) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items, repeat(key)))
+
+
+def encrypt_many(data_items, public_key, max_workers=None):
+    """
+    Encrypt several messages with RSA-OAEP (SHA-256) in parallel threads.
+    
+    The modular exponentiation runs in native code that releases the GIL,
+    so independent messages are spread over a thread pool.
+    
+    Args:
+        data_items: Iterable of byte strings (each <= 318 bytes for RSA-3072)
+        public_key: Public key object
+        max_workers: Number of threads (default: CPU count)
+    
+    Returns:
+        List of encrypted data (bytes), in input order
+    
+    Raises:
+        ValueError: If any item is too large for RSA encryption
+    """
+    return _map_in_threads(encrypt_with_rsa_oaep, data_items, public_key, max_workers)
+
+
+def decrypt_many(ciphertexts, private_key, max_workers=None):
+    """
+    Decrypt several RSA-OAEP (SHA-256) ciphertexts in parallel threads.
+    
+    Args:
+        ciphertexts: Iterable of encrypted byte strings
+        private_key: Private key object
+        max_workers: Number of threads (default: CPU count)
+    
+    Returns:
+        List of decrypted data (bytes), in input order
+    
+    Raises:
+        ValueError: If any ciphertext fails to decrypt
+    """
+    return _map_in_threads(decrypt_with_rsa_oaep, ciphertexts, private_key, max_workers)
+
+
 # Example usage and testing
 if __name__ == "__main__":
     print("Generating RSA-3072 key pair...")